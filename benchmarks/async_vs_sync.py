@@ -0,0 +1,123 @@
+"""
+Compare gunicorn sync workers with an ASGI server (uvicorn) under many
+concurrent slow clients.
+
+Each client opens a connection, trickles its request headers over
+``--client-delay`` seconds (a slow mobile link) and then reads the response.
+A sync worker is pinned to one such client for the whole time; an ASGI
+worker keeps serving others while it waits.
+
+Usage (from the project root, with the usual env vars set):
+    python benchmarks/async_vs_sync.py --path / --clients 200 --client-delay 0.5 --workers 2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'gunicorn-sync': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'fefelson.wsgi:application',
+        '--worker-class', 'sync', '--workers', str(workers),
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+    'uvicorn-asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'fefelson.asgi:application',
+        '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+        '--log-level', 'warning', '--no-access-log',
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+async def slow_client(port, path, delay):
+    start = time.monotonic()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode())
+        await writer.drain()
+        await asyncio.sleep(delay)
+        # settings.SECURE_PROXY_SSL_HEADER: pretend we are behind the TLS proxy.
+        writer.write(b'X-Forwarded-Proto: https\r\nConnection: close\r\n\r\n')
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    status = int(response.split(b' ', 2)[1]) if response else 0
+    return time.monotonic() - start, status
+
+
+async def run_load(port, path, clients, delay):
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *(slow_client(port, path, delay) for _ in range(clients)), return_exceptions=True
+    )
+    elapsed = time.monotonic() - start
+    latencies = [r[0] for r in results if not isinstance(r, Exception) and r[1] == 200]
+    return elapsed, latencies, len(results) - len(latencies)
+
+
+def bench(name, args):
+    port = free_port()
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='fefelson.settings')
+    proc = subprocess.Popen(SERVERS[name](port, args.workers), cwd=BASE_DIR, env=env)
+    try:
+        wait_for_port(port)
+        elapsed, latencies, failed = asyncio.run(run_load(port, args.path, args.clients, args.client_delay))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    if not latencies:
+        print(f'{name:>14}: all {failed} requests failed')
+        return
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(
+        f'{name:>14}: {len(latencies) / elapsed:7.1f} req/s  '
+        f'p50 {statistics.median(latencies) * 1000:7.0f} ms  '
+        f'p95 {p95 * 1000:7.0f} ms  '
+        f'max {latencies[-1] * 1000:7.0f} ms  '
+        f'failed {failed}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--client-delay', type=float, default=0.5, help='seconds each client takes to send its headers')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    print(f'{args.clients} clients x {args.client_delay}s header delay -> {args.path} ({args.workers} workers)')
+    for name in args.servers:
+        bench(name, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,8 +2,11 @@
 set -o errexit
 
 pip install -r requirements.txt
+python manage.py build_logo_variants
 python manage.py collectstatic --noinput
 python manage.py migrate
+# Backfill matchup rows for games ingested before the table existed
+python manage.py refresh_matchups
 
 # ✅ Seed the database (your custom management command)
 python manage.py seed_data || true
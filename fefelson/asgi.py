@@ -3,6 +3,13 @@ ASGI config for fefelson project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The game list, game detail and JSON feed views are async, so one ASGI worker
+can serve many slow clients, e.g.:
+
+    uvicorn fefelson.asgi:application --workers 2
+
+See benchmarks/async_vs_sync.py for a comparison with gunicorn sync workers.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
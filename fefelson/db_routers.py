@@ -0,0 +1,37 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go to the ``replica`` alias (when one is
+configured) only while a request marked safe by ReplicaRoutingMiddleware is
+being handled, so management commands, ingest and anything inside a write
+request keep reading from the primary.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+# Set per request by fefelson.middleware.ReplicaRoutingMiddleware
+use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and replica_configured():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
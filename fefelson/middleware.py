@@ -0,0 +1,101 @@
+import re
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .db_routers import use_replica
+
+UNSAFE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route reads of safe requests (GET/HEAD/...) to the replica.
+
+    After a client's own write it is pinned to the primary for
+    REPLICA_STICKY_SECONDS via a cookie, so it reads its writes (e.g. saved
+    preferences, a fresh login session) before replication catches up.
+    """
+    async_capable = True
+    sync_capable = True
+
+    cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def reads_from_replica(self, request):
+        if request.method in UNSAFE_METHODS or request.COOKIES.get(self.cookie_name):
+            return False
+        return not any(request.path.startswith(p) for p in settings.REPLICA_EXEMPT_PATHS)
+
+    def pin_after_write(self, request, response):
+        if request.method in UNSAFE_METHODS:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = use_replica.set(self.reads_from_replica(request))
+        try:
+            return self.pin_after_write(request, self.get_response(request))
+        finally:
+            use_replica.reset(token)
+
+    async def __acall__(self, request):
+        token = use_replica.set(self.reads_from_replica(request))
+        try:
+            return self.pin_after_write(request, await self.get_response(request))
+        finally:
+            use_replica.reset(token)
+
+
+class SlateSnapshotMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, plus the slate snapshots ingest publishes at runtime.
+
+    WhiteNoise indexes its files once at startup, so snapshots written later
+    are looked up on disk on first request. Hashed snapshots are then cached
+    like any other static file and marked immutable; the pointer file is
+    re-read every time and served with ``no-cache``.
+    """
+    snapshot_name = re.compile(r'^(current\.json|slate\.[0-9a-f]+\.(json|html))$')
+
+    def __call__(self, request):
+        url = request.path_info
+        if url.startswith(settings.SLATE_SNAPSHOT_URL) and url not in self.files:
+            static_file = self.find_snapshot(url)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def find_snapshot(self, url):
+        name = url[len(settings.SLATE_SNAPSHOT_URL):]
+        if not self.snapshot_name.match(name):
+            return None
+        path = Path(settings.SLATE_SNAPSHOT_ROOT) / name
+        if not path.is_file():
+            return None
+        static_file = self.get_static_file(str(path), url)
+        if name.startswith('slate.'):
+            self.files[url] = static_file
+        return static_file
+
+    def add_cache_headers(self, headers, path, url):
+        if url == settings.SLATE_SNAPSHOT_URL + 'current.json':
+            headers['Cache-Control'] = 'no-cache'
+        else:
+            super().add_cache_headers(headers, path, url)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(settings.SLATE_SNAPSHOT_URL):
+            return url != settings.SLATE_SNAPSHOT_URL + 'current.json'
+        return super().immutable_file_test(path, url)
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from pathlib import Path
 from django.urls import reverse_lazy
 from decouple import config
@@ -67,7 +68,8 @@ else:
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'fefelson.middleware.SlateSnapshotMiddleware',  # WhiteNoise + runtime slate snapshots
+    'fefelson.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -99,15 +101,94 @@ WSGI_APPLICATION = 'fefelson.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+def database_settings(prefix, **defaults):
+    """
+    One DATABASES entry from <prefix>_ENGINE, <prefix>_URL (the database
+    name, or file path on SQLite) and, for server databases, <prefix>_USER,
+    _PASSWORD, _HOST and _PORT; anything unset falls back to ``defaults``.
+    """
+    engine = config(f'{prefix}_ENGINE', default=defaults.get('ENGINE', SQLITE_ENGINE))
+    db = {'ENGINE': engine, 'NAME': config(f'{prefix}_URL', default=defaults.get('NAME', ''))}
+    if engine == SQLITE_ENGINE:
+        # SQLite has one writer: take the write lock when a transaction starts
+        # and wait up to 20s for it, so overlapping ingests queue instead of
+        # failing with "database is locked" part-way through. Other backends
+        # reject these options.
+        db['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20}
+    else:
+        for key in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+            db[key] = config(f'{prefix}_{key}', default=defaults.get(key, ''))
+    return db
+
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': config('DATABASE_URL', default=str(BASE_DIR / 'db.sqlite3')),
-    }
+    'default': database_settings('DATABASE', NAME=str(BASE_DIR / 'db.sqlite3')),
 }
 
+# Optional read replica. Page views and read API requests read from it; writes
+# and the admin always use 'default'. Locally this can be a second SQLite file
+# kept in sync by copying the primary, or a second Postgres database; engine,
+# user, password, host and port default to the primary's.
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = {
+        **database_settings('REPLICA_DATABASE', **DATABASES['default']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['fefelson.db_routers.PrimaryReplicaRouter']
+REPLICA_EXEMPT_PATHS = ['/admin/']
+# How long a client reads from the primary after its own write
+REPLICA_STICKY_SECONDS = 15
+
+# Games move from the live tables to the archive tables this long after they
+# start (archive_finished_games); results can still be posted afterwards.
+ARCHIVE_AFTER = timedelta(hours=12)
+
+# Leagues of one slate post written at the same time (PostgreSQL only; see
+# sport_matchups/ingest.py)
+INGEST_WORKERS = 5
+
+# How long ingest responses are kept for replay to retries (Idempotency-Key)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# A key still marked in progress after this long is from a request whose
+# worker was killed; a retry may take it over. Longer than any request is
+# allowed to run (gunicorn's worker timeout is 30s).
+IDEMPOTENCY_IN_PROGRESS_LEASE = timedelta(minutes=2)
+
+# Besides staff, who may scrape /metrics/ (e.g. a Prometheus agent on the host)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
 AUTH_USER_MODEL = 'sport_matchups.User'
 
+# Sessions live in a signed cookie and the logged-in user (with preferences)
+# in the cache, so identifying a user costs no queries per request.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+AUTHENTICATION_BACKENDS = ['sport_matchups.auth_backends.CachedModelBackend']
+# How long a cached user survives without being saved
+USER_CACHE_SECONDS = 600
+
+# Shared between worker processes so a save in one invalidates them all.
+# Set REDIS_URL (needs the redis package) when running on several hosts.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.django_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -144,7 +225,35 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Distinct folder for collected files
 STATICFILES_DIRS = [BASE_DIR / 'fefelson' / 'static']  # Source static files
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Build artifacts (e.g. downscaled logos from `build_logo_variants`) that
+# collectstatic picks up alongside the app static dirs.
+GENERATED_STATIC_ROOT = BASE_DIR / 'generated_static'
+if GENERATED_STATIC_ROOT.exists():
+    STATICFILES_DIRS.append(GENERATED_STATIC_ROOT)
+
+# Slate snapshots published on ingest (see sport_matchups/snapshot.py);
+# served by SlateSnapshotMiddleware since they appear after startup.
+SLATE_SNAPSHOT_ROOT = BASE_DIR / 'slate_snapshots'
+SLATE_SNAPSHOT_URL = STATIC_URL + 'slate/'
+
+# Live odds over Server-Sent Events (/live/odds/). Each client holds its
+# connection open indefinitely, which only an ASGI server (uvicorn, see
+# fefelson/asgi.py) can afford; under gunicorn sync workers every viewer
+# would pin a worker. Off unless LIVE_ODDS=1, and even then only served to
+# requests that arrive over ASGI.
+LIVE_ODDS_ENABLED = config('LIVE_ODDS', default=False, cast=bool)
+
+# Hashed filenames let WhiteNoise serve static files with far-future
+# "immutable" cache headers.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -165,3 +274,11 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 # General settings
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER  # Sender email (e.g., 'noreply@yourapp.com')
 SERVER_EMAIL = EMAIL_HOST_USER  # For error emails
+
+# Digest job (send_digests): subscribers per shard, and how long a worker's
+# claim on a shard lasts without a heartbeat before another worker may take it
+EMAIL_SHARD_SIZE = 500
+EMAIL_SHARD_LEASE = timedelta(minutes=2)
+# Seconds an SMTP call may block; well under EMAIL_SHARD_LEASE so a send
+# always finishes (or fails) while the worker still owns its shard.
+EMAIL_TIMEOUT = 20
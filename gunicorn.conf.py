@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+"""
+Picked up automatically when gunicorn starts from the project root.
+
+The app is preloaded in the master and warmed up there (see
+sport_matchups/warmup.py) before any worker is forked, so workers start with
+compiled templates and a loaded static manifest instead of paying for them
+on their first requests. Set GUNICORN_PRELOAD=0 to load and warm up in each
+worker instead (e.g. to let workers pick up code changes on HUP).
+"""
+import os
+import shutil
+import tempfile
+
+# Workers write metrics to mmap'd files here so /metrics/ can sum them
+# (see sport_matchups/metrics.py). Must exist before prometheus_client is
+# imported, i.e. before the app is loaded. Cleared on a fresh start (but not
+# when this file is re-read on HUP) so old samples are not summed in.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(tempfile.gettempdir(), 'fefelson-metrics')
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def _warm_up(log):
+    from sport_matchups.warmup import warm_up
+
+    for name, count, seconds in warm_up():
+        if count is not None:
+            log.info('warmup %s: %d in %.1f ms', name, count, seconds * 1000)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before forking.
+    if preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm_up(worker.log)
@@ -9,17 +9,28 @@ from rest_framework.decorators import action
 from django.contrib.auth import authenticate
 from datetime import datetime
 import logging
+import math
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
-from .utils import get_games_for_user
-from .emails import send_user_email
+from .purge import purge_past_games
+from .matchups import refresh_matchups
+from .ingest import league_key, lock_leagues, partition, run_by_league
+from .pitchers import parse_pitcher, upsert_starting_pitchers
+from .rankings import rank_team_stats
+from .reference import reference
+from .snapshot import publish_slate_snapshot
+from .idempotency import idempotent
+from .live import publish_odds
+from .clv import record_display_picks
+from .notifications import start_email_run, work_email_run
+from .metrics import EMAIL_JOB_SECONDS, INGEST_SECONDS, record_ingest, timed
 
-from .models import (Game, GameOdds, Team, League, AI, AIGameOdds, User,
-                     SportsBook, Stat, TeamStat, StartingPitcher, Preferences)
+from .models import (Game, GameOdds, Team, League, AI, AIGameOdds,
+                     Stat, TeamStat, Preferences, ArchivedGame)
 
 
-from django.utils import timezone
+from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +72,17 @@ class GameSerializer(serializers.ModelSerializer):
         fields = ['game_id', 'game_date', 'league', 'away_team', 'home_team']
 
 
+def serialize_game(game, league_name):
+    """GameSerializer's output, without loading the league back from the DB."""
+    return {
+        'game_id': game.game_id,
+        'game_date': serializers.DateTimeField().to_representation(game.game_date),
+        'league': league_name,
+        'away_team': game.away_team_id,
+        'home_team': game.home_team_id,
+    }
+
+
 class GameOddsSerializer(serializers.ModelSerializer):
     game = serializers.PrimaryKeyRelatedField(queryset=Game.objects.all())
 
@@ -75,7 +97,7 @@ class TeamStatSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TeamStat
-        fields = ['team', 'stat', 'score', 'color']
+        fields = ['team', 'stat', 'value', 'score', 'color']
 
 
 class StatSerializer(serializers.ModelSerializer):
@@ -85,6 +107,12 @@ class StatSerializer(serializers.ModelSerializer):
         fields = ['league', 'name']
 
 
+class PurgeSerializer(serializers.Serializer):
+    """Options for deleting past games; "archive" accepts true/false, "0"/"1", etc."""
+    archive = serializers.BooleanField(default=True)
+    chunk_size = serializers.IntegerField(default=500, min_value=1, max_value=5000)
+
+
 class AIGameOddsSerializer(serializers.ModelSerializer):
     game = serializers.PrimaryKeyRelatedField(queryset=Game.objects.all())
     ai = serializers.SlugRelatedField(slug_field='name', queryset=AI.objects.all())
@@ -108,6 +136,8 @@ class GameViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ['post']
 
+    @idempotent('games')
+    @timed(INGEST_SECONDS, 'games')
     def create(self, request):
         """
         Accepts a list of games with optional odds and AI odds.
@@ -117,81 +147,23 @@ class GameViewSet(viewsets.ModelViewSet):
         if not isinstance(games, list):
             return Response({"error": "'games' must be a list"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_games, updated_games, errors = [], [], []
+        ref = reference()
+        # One transaction per league; see ingest.py for how they may overlap
+        groups = partition(games, league_key)
+        results = run_by_league(groups, lambda league, items: self.ingest_league(league, items, ref))
 
-        for g in games:
-            try:
-                # -------------------------
-                # Game (update_or_create)
-                # -------------------------
-                league = League.objects.get(name=g['leagueId'])
-                home_team = Team.objects.get(id=g['homeId'])
-                away_team = Team.objects.get(id=g['awayId'])
-
-                game_obj, created = Game.objects.update_or_create(
-                    game_id=g['title'],
-                    defaults={
-                        'game_date': g['gameTime'],
-                        'league': league,
-                        'home_team': home_team,
-                        'away_team': away_team,
-                    }
-                )
-                serialized_game = GameSerializer(game_obj).data
-                if created:
-                    created_games.append(serialized_game)
-                else:
-                    updated_games.append(serialized_game)
-
-                # -------------------------
-                # GameOdds (latest odds only)
-                # -------------------------
-                latest_odds = g.get("odds", [{}])
-                if latest_odds:
-                    book = SportsBook.objects.get(name="MGM")
-                    GameOdds.objects.update_or_create(
-                        game=game_obj,
-                        book=book,
-                        defaults={
-                            'home_ml': latest_odds[-1].get('home_ml'),
-                            'away_ml': latest_odds[-1].get('away_ml'),
-                            'spread': latest_odds[-1].get('home_spread'),
-                        }
-                    )
-
-                # -------------------------
-                # AI Odds (hardcoded ESPN example)
-                # -------------------------
-                if "predictor" in g:
-                    ai = AI.objects.get(name="ESPN")
-                    AIGameOdds.objects.update_or_create(
-                        game=game_obj,
-                        ai=ai,
-                        defaults={
-                            'away_pct': g["predictor"][0][1],
-                            'home_pct': g["predictor"][1][1],
-                        }
-                    )
-
-                # -------------------------
-                # (Optional) Baseball details
-                # -------------------------
-                if g.get("home_pitcher") or g.get("away_pitcher"):
-                    # Requires BaseballGameDetails model (separate table, OneToOne with Game)
-                    from .models import BaseballGameDetails, Player
-                    home_pitcher = Player.objects.filter(id=g.get("home_pitcher")).first()
-                    away_pitcher = Player.objects.filter(id=g.get("away_pitcher")).first()
-                    BaseballGameDetails.objects.update_or_create(
-                        game=game_obj,
-                        defaults={
-                            "home_pitcher": home_pitcher,
-                            "away_pitcher": away_pitcher,
-                        }
-                    )
+        created_games, updated_games, errors, touched_games = [], [], [], []
+        for result in results:
+            created_games += result["created"]
+            updated_games += result["updated"]
+            errors += result["errors"]
+            touched_games += result["touched"]
 
-            except Exception as e:
-                logger.error(f"Error processing game {g.get('title')}: {e}", exc_info=True)
-                errors.append({"game": g.get('title'), "error": str(e)})
+        if touched_games:
+            transaction.on_commit(publish_slate_snapshot, robust=True)
+            transaction.on_commit(lambda: publish_odds(touched_games), robust=True)
+            transaction.on_commit(lambda: record_display_picks(touched_games), robust=True)
+        record_ingest('games', created=len(created_games), updated=len(updated_games), error=len(errors))
 
         response = {
             "created_games": created_games,
@@ -201,16 +173,156 @@ class GameViewSet(viewsets.ModelViewSet):
         status_code = status.HTTP_200_OK if created_games or updated_games else status.HTTP_400_BAD_REQUEST
         return Response(response, status=status_code)
 
+    def ingest_league(self, league_name, games, ref):
+        """
+        Write one league's games in a transaction that holds the league's
+        row lock. Each game gets a savepoint so a bad one is reported
+        without undoing the rest.
+        Returns:
+            dict of created, updated, errors and touched (Game pks)
+        """
+        result = {"created": [], "updated": [], "errors": [], "touched": []}
+        try:
+            if league_name is None:
+                raise ValueError("missing or invalid leagueId")
+            league_id = ref.league_id(league_name)
+        except ValueError as e:
+            result["errors"] = [{"game": g.get('title') if isinstance(g, dict) else None, "error": str(e)} for g in games]
+            return result
+
+        starters = []
+        with transaction.atomic():
+            lock_leagues([league_id])
+            for g in games:
+                try:
+                    with transaction.atomic():
+                        game_obj, created, game_starters = self.ingest_game(g, league_id, ref)
+                except Exception as e:
+                    logger.error(f"Error processing game {g.get('title')}: {e}", exc_info=True)
+                    result["errors"].append({"game": g.get('title'), "error": str(e)})
+                    continue
+                result["touched"].append(game_obj.pk)
+                result["created" if created else "updated"].append(serialize_game(game_obj, league_name))
+                starters += game_starters
+
+            if starters:
+                _, pitcher_errors = upsert_starting_pitchers(starters)
+                result["errors"] += [{"game": game_id, "error": error} for game_id, error in pitcher_errors]
+            refresh_matchups(game_ids=result["touched"])
+        return result
+
+    def ingest_game(self, g, league_id, ref):
+        """
+        Upsert one game with its odds and AI odds.
+        Returns:
+            (Game, created, starting pitchers to upsert)
+        """
+        # -------------------------
+        # Game (update_or_create)
+        # -------------------------
+        home_team = ref.team(g['homeId'])
+        away_team = ref.team(g['awayId'])
+
+        game_obj, created = Game.objects.update_or_create(
+            game_id=g['title'],
+            defaults={
+                'game_date': g['gameTime'],
+                'league_id': league_id,
+                'home_team_id': home_team.id,
+                'away_team_id': away_team.id,
+            }
+        )
+
+        # -------------------------
+        # GameOdds (latest odds only)
+        # -------------------------
+        latest_odds = g.get("odds", [{}])
+        if latest_odds:
+            GameOdds.objects.update_or_create(
+                game=game_obj,
+                book_id=ref.book_id("MGM"),
+                defaults={
+                    'home_ml': latest_odds[-1].get('home_ml'),
+                    'away_ml': latest_odds[-1].get('away_ml'),
+                    'spread': latest_odds[-1].get('home_spread'),
+                }
+            )
+
+        # -------------------------
+        # AI Odds (hardcoded ESPN example)
+        # -------------------------
+        if "predictor" in g:
+            AIGameOdds.objects.update_or_create(
+                game=game_obj,
+                ai_id=ref.ai_id("ESPN"),
+                defaults={
+                    'away_pct': g["predictor"][0][1],
+                    'home_pct': g["predictor"][1][1],
+                }
+            )
+
+        # -------------------------
+        # Starting pitchers (upserted for the whole league below)
+        # -------------------------
+        starters = [
+            (game_obj, team.id, parse_pitcher(g[f"{side}_pitcher"]))
+            for side, team in (("home", home_team), ("away", away_team))
+            if g.get(f"{side}_pitcher")
+        ]
+        return game_obj, created, starters
+
     @action(detail=False, methods=['post'], url_path='set')
     def set_games(self, request):
         return self.create(request)
 
 
+    @action(detail=False, methods=['post'], url_path='results')
+    @idempotent('results')
+    def set_results(self, request):
+        """
+        Record final scores: {"results": [{"title": ..., "away_score": ..., "home_score": ...}]}.
+        Games that were already archived get their archive row updated instead.
+        """
+        results = request.data.get("results", [])
+        if not isinstance(results, list):
+            return Response({"error": "'results' must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        scores = {}
+        for r in results:
+            try:
+                scores[r['title']] = (int(r['away_score']), int(r['home_score']))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        updated = []
+        for model in (Game, ArchivedGame):
+            rows = list(model.objects.filter(game_id__in=scores).only('game_id'))
+            for row in rows:
+                row.away_score, row.home_score = scores[row.game_id]
+            model.objects.bulk_update(rows, ['away_score', 'home_score'])
+            updated.extend(row.game_id for row in rows)
+
+        missing = [{"game": title, "error": "unknown game or invalid score"}
+                   for title in {r.get('title') for r in results if isinstance(r, dict)} if title not in updated]
+        return Response({"updated": updated, "errors": missing}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['post'], url_path='delete')
     def delete_past_games(self, request):
-        """Delete all games with a game_date in the past"""
-        deleted, _ = Game.objects.filter(game_date__lt=timezone.now()).delete()
-        return Response({"deleted_count": deleted}, status=status.HTTP_200_OK)
+        """
+        Remove all games with a game_date in the past from the live tables,
+        in primary-key chunks. They are archived first unless "archive" is false.
+        Optional body: {"archive": true, "chunk_size": 500}; invalid values get 400.
+        """
+        options = PurgeSerializer(data=request.data)
+        if not options.is_valid():
+            return Response(options.errors, status=status.HTTP_400_BAD_REQUEST)
+        counts = purge_past_games(**options.validated_data)
+        transaction.on_commit(publish_slate_snapshot, robust=True)
+        return Response({
+            "deleted_count": sum(n for name, n in counts.items() if name != "archived"),
+            "deleted": {name: n for name, n in counts.items() if name != "archived"},
+            "archived_count": counts["archived"],
+        }, status=status.HTTP_200_OK)
 
 
 
@@ -224,66 +336,146 @@ class TeamStatViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ['post']
 
+    @idempotent('team_stats')
+    @timed(INGEST_SECONDS, 'team_stats')
     def create(self, request):
         """
-        Accepts a list of games with optional odds and AI odds.
-        Uses update_or_create so that existing rows get updated.
+        Accepts a list of team stats: {"team_stats": [{"league", "name", "teamId", "value"}]}.
+        "score" is still accepted as the raw value for older clients, and
+        "higher_is_better" may be sent to flip a stat's ranking direction.
+        Rows are validated first and bad ones reported individually; the rest
+        are upserted in bulk, then percentile score and color are recomputed
+        server-side for every stat the batch touched. A sent "color" is
+        ignored, with a warning.
         """
         teamStats = request.data.get("team_stats", [])
         if not isinstance(teamStats, list):
             return Response({"error": "'team_stats' must be a list"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_stats, updated_stats, errors = [], [], []
+        errors, warnings = [], []
+        ref = reference()
 
+        # -------------------------
+        # Validate rows
+        # -------------------------
+        rows = []
         for ts in teamStats:
+            name = ts.get('name') if isinstance(ts, dict) else None
             try:
-                # -------------------------
-                # Stat (update_or_create)
-                # -------------------------
-                league = League.objects.get(name=ts['league'])
-
-                stat_obj, created = Stat.objects.update_or_create(
-                    league=league,
-                    name=ts['name'],
-                    defaults={
-                    }
-                )
-                serialized_stat = StatSerializer(stat_obj).data
-
-
-                # -------------------------
-                # TeamStats
-                # -------------------------
-                team = Team.objects.get(id=ts['teamId'])
-
-                team_stat, created = TeamStat.objects.update_or_create(
-                    stat=stat_obj,
-                    team=team,
-                    defaults={
-                        'score': ts["score"],
-                        'color': ts["color"],
-                    }
-                )
-                if created:
-                    created_stats.append(TeamStatSerializer(team_stat).data)
-                else:
-                    updated_stats.append(TeamStatSerializer(team_stat).data)
-
-
-
-
+                rows.append(self.parse_team_stat(ts, ref))
             except Exception as e:
-                logger.error(f"Error processing stat {ts.get('name')}: {e}", exc_info=True)
-                errors.append({"stats": ts.get('name'), "error": str(e)})
-
+                logger.error(f"Error processing stat {name}: {e}")
+                errors.append({"stats": name, "error": str(e)})
+                continue
+            if ts.get("color") is not None:
+                warnings.append({"stats": name, "warning": "color is computed server-side; the sent value was ignored"})
+
+        # Values, ranks and matchups change together: a failed ranking must
+        # not leave new values with stale scores, and two batches for the
+        # same league queue on its row lock (see ingest.py).
+        with transaction.atomic():
+            lock_leagues({league_id for league_id, *_ in rows})
+
+            # -------------------------
+            # Stats (bulk get-or-create)
+            # -------------------------
+            stat_keys = {(league_id, name) for league_id, name, *_ in rows}
+            stats = {(s.league_id, s.name): s for s in Stat.objects.filter(
+                league_id__in={k[0] for k in stat_keys}, name__in={k[1] for k in stat_keys}
+            )}
+            Stat.objects.bulk_create([Stat(league_id=l, name=n) for l, n in stat_keys if (l, n) not in stats])
+            stats = {(s.league_id, s.name): s for s in Stat.objects.filter(
+                league_id__in={k[0] for k in stat_keys}, name__in={k[1] for k in stat_keys}
+            )}
+
+            direction_changed = []
+            for league_id, name, _, _, higher_is_better in rows:
+                stat = stats[(league_id, name)]
+                if higher_is_better is not None and stat.higher_is_better != bool(higher_is_better):
+                    stat.higher_is_better = bool(higher_is_better)
+                    direction_changed.append(stat)
+            Stat.objects.bulk_update(direction_changed, ['higher_is_better'])
+
+            # -------------------------
+            # TeamStats (bulk upsert + rank)
+            # -------------------------
+            team_stats = {}
+            for league_id, name, team_id, value, _ in rows:
+                stat_id = stats[(league_id, name)].id
+                team_stats[(team_id, stat_id)] = TeamStat(team_id=team_id, stat_id=stat_id, value=value, score=0, color='')
+
+            existing = set(TeamStat.objects.filter(
+                stat_id__in={k[1] for k in team_stats}
+            ).values_list('team_id', 'stat_id'))
+            TeamStat.objects.bulk_create(
+                team_stats.values(), update_conflicts=True,
+                unique_fields=['team', 'stat'], update_fields=['value'],
+            )
+            # Percentiles are league-relative, so every re-ranked team's games change
+            refresh_matchups(team_ids=rank_team_stats({k[1] for k in team_stats}))
+
+        # Same shape as TeamStatSerializer, without per-row serializer overhead
+        created_stats, updated_stats = [], []
+        for ts in TeamStat.objects.filter(stat_id__in={k[1] for k in team_stats}).order_by('id').values(
+            'team_id', 'stat_id', 'value', 'score', 'color'
+        ):
+            key = (ts['team_id'], ts['stat_id'])
+            if key not in team_stats:
+                continue
+            data = {'team': ts['team_id'], 'stat': ts['stat_id'], 'value': ts['value'],
+                    'score': ts['score'], 'color': ts['color']}
+            if key in existing:
+                updated_stats.append(data)
+            else:
+                created_stats.append(data)
+
+        record_ingest('team_stats', created=len(created_stats), updated=len(updated_stats), error=len(errors))
         status_code = status.HTTP_200_OK if created_stats or updated_stats else status.HTTP_400_BAD_REQUEST
         response = {
             "created_stats": created_stats,
             "updated_stats": updated_stats,
             "errors": errors
         }
+        if warnings:
+            response["warnings"] = warnings
         return Response(response, status=status_code)
 
+    def parse_team_stat(self, ts, ref):
+        """
+        Check one posted row against the reference data and the Stat/TeamStat
+        columns, so nothing that reaches the bulk writes can fail there.
+        Returns:
+            (league_id, stat name, team_id, value, higher_is_better)
+        """
+        if not isinstance(ts, dict):
+            raise ValueError("each stat must be an object")
+        name = ts.get('name')
+        max_length = Stat._meta.get_field('name').max_length
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("missing stat name")
+        if len(name) > max_length:
+            raise ValueError(f"stat name longer than {max_length} characters")
+
+        league_id = ref.league_id(ts.get('league')) if isinstance(ts.get('league'), str) else None
+        if league_id is None:
+            raise ValueError(f"unknown league {ts.get('league')}")
+        team = ref.team(ts.get('teamId'))
+        if team.league_id != league_id:
+            raise ValueError(f"team {team.id} is not in {ts['league']}")
+
+        raw = ts["value"] if ts.get("value") is not None else ts.get("score")
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid value {raw!r}") from None
+        if not math.isfinite(value):
+            raise ValueError(f"invalid value {raw!r}")
+
+        higher_is_better = ts.get("higher_is_better")
+        if higher_is_better is not None and not isinstance(higher_is_better, bool):
+            raise ValueError("higher_is_better must be true or false")
+        return league_id, name, team.id, value, higher_is_better
+
     @action(detail=False, methods=['post'], url_path='set')
     def set_teams(self, request):
         return self.create(request)
@@ -293,27 +485,18 @@ class TeamStatViewSet(viewsets.ModelViewSet):
 
 @api_view(["POST"])
 @permission_classes([IsAdminUser])  # Only admins can trigger this
+@timed(EMAIL_JOB_SECONDS)
 def send_email_notifications(request):
-    # Filter users that want emails
-    users = User.objects.filter(send_email=True).select_related("preferences")
-    sent_count, skipped_count = 0, 0
-
-    for user in users:
-        prefs = getattr(user, "preferences", None)  # Safe access
-        if not prefs:
-            skipped_count += 1
-            continue
-
-        games = get_games_for_user(prefs)
-        if send_user_email(user, games):
-            sent_count += 1
-        else:
-            skipped_count += 1
-
+    """
+    Run the digest job in this process. It joins the open run if workers
+    (send_digests) are already on it, so nobody is emailed twice.
+    """
+    counts = work_email_run(start_email_run())
     return Response({
         "status": "done",
-        "emails_sent": sent_count,
-        "emails_skipped": skipped_count,
+        "emails_sent": counts.sent,
+        "emails_skipped": counts.skipped,
+        "emails_unchanged": counts.unchanged,
     })
 
 
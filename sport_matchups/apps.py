@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SportMatchupsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sport_matchups'
+
+    def ready(self):
+        # Signal receivers that invalidate the cached user and reference data
+        from . import auth_backends, reference  # noqa: F401
@@ -0,0 +1,69 @@
+# auth_backends.py
+"""
+Authentication backend that keeps the logged-in user in the cache.
+
+With signed-cookie sessions the session itself costs no query; this removes
+the per-request user lookup too. The user is cached together with its
+preferences (select_related), so ``user.preferences`` is free as well. Saving
+or deleting either row drops the cached copy.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metrics import record_cache
+from .models import Preferences, User
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def preferences_cached(user):
+    """True if ``user.preferences`` can be read without a query."""
+    return type(user).preferences.related.is_cached(user)
+
+
+class CachedModelBackend(ModelBackend):
+
+    def user_queryset(self):
+        return get_user_model()._default_manager.select_related('preferences')
+
+    def get_user(self, user_id):
+        user = cache.get(user_cache_key(user_id))
+        record_cache('user', user is not None)
+        if user is None:
+            user = self.user_queryset().filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(user_cache_key(user_id), user, settings.USER_CACHE_SECONDS)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await cache.aget(user_cache_key(user_id))
+        record_cache('user', user is not None)
+        if user is None:
+            user = await self.user_queryset().filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            await cache.aset(user_cache_key(user_id), user, settings.USER_CACHE_SECONDS)
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidate_user(user_id):
+    # After commit, so a concurrent request cannot re-cache the old row.
+    transaction.on_commit(lambda: cache.delete(user_cache_key(user_id)))
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Preferences)
+def preferences_changed(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
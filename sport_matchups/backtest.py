@@ -0,0 +1,190 @@
+# backtest.py
+"""
+Historical backtest of the calculate_edge + calculate_wager strategy.
+
+Finished games (live or archived) are loaded once into NumPy arrays; every
+(min edge, Kelly fraction) combination is then evaluated as one row of a 2-D
+array, so a full season across thousands of parameter combinations is a
+handful of array operations instead of nested Python loops.
+
+Bets compound sequentially in start-time order, the same way a user following
+the emails with a running bankroll would.
+"""
+import numpy as np
+
+from .models import (Game, GameOdds, AIGameOdds,
+                     ArchivedGame, ArchivedGameOdds, ArchivedAIGameOdds)
+
+SOURCES = (
+    (Game, GameOdds, AIGameOdds),
+    (ArchivedGame, ArchivedGameOdds, ArchivedAIGameOdds),
+)
+
+# Parameter combinations evaluated per block; bounds memory to
+# roughly block x games x 8 bytes per temporary array.
+BLOCK_SIZE = 64
+
+# Most values one grid may expand to; the combinations are the product of
+# two grids, so this keeps a request to at most 40,000 of them.
+MAX_GRID_POINTS = 200
+
+
+def parse_grid(value):
+    """
+    Parse "5" / "2.5,5,7.5" / "0:15:0.5" (start:stop:step, stop inclusive)
+    into a list of floats. Raises ValueError for a malformed grid, a step
+    that is not positive, or more than MAX_GRID_POINTS values.
+    """
+    value = str(value).strip()
+    if ':' in value:
+        start, stop, step = (float(v) for v in value.split(':'))
+        if not all(np.isfinite((start, stop, step))):
+            raise ValueError(f"grid {value} is not finite")
+        if step <= 0:
+            raise ValueError(f"grid step must be positive, got {step}")
+        if stop >= start and (stop - start) / step + 1 > MAX_GRID_POINTS:
+            raise ValueError(f"grid {value} has more than {MAX_GRID_POINTS} values")
+        return [round(v, 6) for v in np.arange(start, stop + step / 2, step)]
+    grid = [float(v) for v in value.split(',') if v.strip()]
+    if not all(np.isfinite(grid)):
+        raise ValueError(f"grid {value} is not finite")
+    if len(grid) > MAX_GRID_POINTS:
+        raise ValueError(f"grid {value} has more than {MAX_GRID_POINTS} values")
+    return grid
+
+
+def load_history(leagues=None, start=None, end=None, ai=None):
+    """
+    Finished games that have book odds and AI odds, sorted by game_date.
+    Returns:
+        dict of equal-length arrays: game_date, league, away_ml, home_ml,
+        away_pct, home_pct, home_won, push
+    """
+    rows = {}
+    for game_model, odds_model, ai_model in SOURCES:
+        games = game_model.objects.filter(home_score__isnull=False, away_score__isnull=False)
+        if leagues:
+            games = games.filter(league__name__in=leagues)
+        if start:
+            games = games.filter(game_date__gte=start)
+        if end:
+            games = games.filter(game_date__lt=end)
+
+        # First odds row per game, matching what the site displays
+        odds = {}
+        for game_pk, away_ml, home_ml in odds_model.objects.filter(game__in=games).order_by('id').values_list(
+            'game_id', 'away_ml', 'home_ml'
+        ):
+            odds.setdefault(game_pk, (away_ml, home_ml))
+
+        ai_odds = ai_model.objects.filter(game__in=games)
+        if ai:
+            ai_odds = ai_odds.filter(ai__name=ai)
+        probs = {}
+        for game_pk, away_pct, home_pct in ai_odds.order_by('id').values_list('game_id', 'away_pct', 'home_pct'):
+            probs.setdefault(game_pk, (away_pct, home_pct))
+
+        for game_pk, game_id, game_date, league, away_score, home_score in games.values_list(
+            'id', 'game_id', 'game_date', 'league__name', 'away_score', 'home_score'
+        ):
+            if game_pk in odds and game_pk in probs:
+                rows[game_id] = (game_date, league, *odds[game_pk], *probs[game_pk],
+                                 home_score > away_score, home_score == away_score)
+
+    ordered = sorted(rows.values(), key=lambda r: r[0])
+    columns = list(zip(*ordered)) or [()] * 8
+    return {
+        'game_date': np.array(columns[0], dtype=object),
+        'league': np.array(columns[1], dtype=object),
+        'away_ml': np.array(columns[2], dtype=float),
+        'home_ml': np.array(columns[3], dtype=float),
+        'away_pct': np.array(columns[4], dtype=float),
+        'home_pct': np.array(columns[5], dtype=float),
+        'home_won': np.array(columns[6], dtype=bool),
+        'push': np.array(columns[7], dtype=bool),
+    }
+
+
+def decimal_odds(ml):
+    """Vectorized odds.to_decimal_odds."""
+    ml = np.asarray(ml, dtype=float)
+    with np.errstate(divide='ignore'):
+        return np.where(ml > 0, ml / 100 + 1, np.where(ml < 0, 100 / np.abs(ml) + 1, 1.0))
+
+
+def pick_bets(history):
+    """
+    Vectorized calculate_edge + full-Kelly calculate_wager for every game.
+    Returns:
+        dict of arrays: edge (percent), kelly (fraction of bankroll),
+        ret (profit per unit staked: decimal - 1, -1, or 0 for a push), won
+    """
+    home_dec = decimal_odds(history['home_ml'])
+    away_dec = decimal_odds(history['away_ml'])
+    home_edge = history['home_pct'] - 100 / home_dec
+    away_edge = history['away_pct'] - 100 / away_dec
+
+    bet_home = (home_edge > away_edge) & (home_edge > 0)
+    bet_away = ~bet_home & (away_edge > 0)
+    betting = (bet_home | bet_away) & (np.where(bet_home, home_dec, away_dec) > 1)
+
+    edge = np.where(bet_home, home_edge, np.where(bet_away, away_edge, 0.0))
+    dec = np.where(bet_home, home_dec, away_dec)
+    prob = np.where(bet_home, history['home_pct'], history['away_pct']) / 100
+    won = np.where(bet_home, history['home_won'], ~history['home_won']) & ~history['push']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kelly = (prob * (dec - 1) - (1 - prob)) / (dec - 1)
+    kelly = np.where(betting, np.clip(kelly, 0, 1), 0.0)
+    ret = np.where(history['push'], 0.0, np.where(won, dec - 1, -1.0))
+    return {'edge': np.where(betting, edge, -np.inf), 'kelly': kelly, 'ret': ret, 'won': won}
+
+
+def run_backtest(history, min_edges, kelly_fractions, bankroll=1000):
+    """
+    Evaluate every (min_edge, kelly_fraction) combination.
+    Args:
+        history (dict): Output of load_history
+        min_edges (list): Minimum edge in percentage points
+        kelly_fractions (list): Multiplier on the full-Kelly stake
+        bankroll (float): Starting bankroll
+    Returns:
+        list of dicts, best final bankroll first
+    """
+    picks = pick_bets(history)
+    grid_edge, grid_kelly = (g.ravel() for g in np.meshgrid(
+        np.asarray(min_edges, dtype=float), np.asarray(kelly_fractions, dtype=float), indexing='ij'
+    ))
+    n_games = len(picks['edge'])
+    results = []
+
+    for lo in range(0, len(grid_edge), BLOCK_SIZE):
+        min_edge = grid_edge[lo:lo + BLOCK_SIZE, None]
+        fraction = grid_kelly[lo:lo + BLOCK_SIZE, None]
+
+        bets = picks['edge'][None, :] >= min_edge
+        stake_frac = np.minimum(fraction * picks['kelly'][None, :], 1.0) * bets
+        growth = 1 + stake_frac * picks['ret'][None, :]
+
+        path = bankroll * np.cumprod(growth, axis=1)
+        before = np.concatenate([np.full((len(min_edge), 1), float(bankroll)), path[:, :-1]], axis=1)
+        turnover = (before * stake_frac).sum(axis=1)
+        peak = np.maximum.accumulate(np.concatenate([before[:, :1], path], axis=1), axis=1)[:, 1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.nan_to_num(1 - path / peak).max(axis=1) if n_games else np.zeros(len(min_edge))
+
+        final = path[:, -1] if n_games else np.full(len(min_edge), float(bankroll))
+        n_bets = bets.sum(axis=1)
+        wins = (bets & picks['won'][None, :]).sum(axis=1)
+        for i in range(len(min_edge)):
+            results.append({
+                'min_edge': float(min_edge[i, 0]),
+                'kelly_fraction': float(fraction[i, 0]),
+                'bets': int(n_bets[i]),
+                'wins': int(wins[i]),
+                'final_bankroll': float(final[i]),
+                'roi': float((final[i] - bankroll) / turnover[i] * 100) if turnover[i] else 0.0,
+                'max_drawdown': float(drawdown[i] * 100),
+            })
+
+    return sorted(results, key=lambda r: r['final_bankroll'], reverse=True)
@@ -0,0 +1,148 @@
+# clv.py
+"""
+Closing-line value (CLV) of the picks the site shows and emails.
+
+Every time a pick for a game that has not started is displayed (after
+ingest) or emailed it is stored with the price on offer; only the first
+price per game, side and source counts. Once a game starts,
+``record_closing_lines`` snapshots each book's line as the close, scores the
+game's picks against it and adds them to the running per-league / AI /
+edge-bucket totals in ClvAggregate. Each run only touches games that
+started since the last one (Game.close_recorded, set even for games without
+odds), so its cost follows the number of games that changed, not the size
+of the history.
+
+There is no odds history, so the close is whatever GameOdds holds when the
+run first sees the game as started: schedule the command every few minutes
+and well inside ARCHIVE_AFTER, from a single scheduler.
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ClosingLine, ClvAggregate, Game, Pick
+from .odds import calculate_edge, to_decimal_odds
+
+# Width of the edge buckets aggregates are grouped by, in percentage points.
+EDGE_BUCKET_WIDTH = 2.5
+
+
+def edge_bucket(edge):
+    """Lower bound of the bucket ``edge`` falls in, e.g. 6.1 -> 5.0."""
+    return math.floor(edge / EDGE_BUCKET_WIDTH) * EDGE_BUCKET_WIDTH
+
+
+def clv_percent(taken_ml, closing_ml):
+    """
+    How much better the price taken was than the close.
+    Returns:
+        float: percent of decimal payout; positive means the pick beat the close
+    """
+    return (to_decimal_odds(taken_ml) / to_decimal_odds(closing_ml) - 1) * 100
+
+
+def _pick(game, side, ml, edge, source):
+    # Picks are made from the first (latest) book and AI rows, as on the cards.
+    odds = next(iter(game.gameodds_set.all()))
+    ai_odds = next(iter(game.aigameodds_set.all()))
+    return Pick(
+        game_key=game.game_id, league_id=game.league_id, ai_id=ai_odds.ai_id,
+        book_id=odds.book_id, source=source, side=side, ml=ml, edge=edge,
+        edge_bucket=edge_bucket(edge),
+    )
+
+
+def record_display_picks(game_pks):
+    """
+    Store the side each upcoming game's card recommends.
+    Args:
+        game_pks (iterable): Game primary keys just written by ingest
+    Returns:
+        int: picks offered (already-recorded ones are ignored)
+    """
+    games = (
+        Game.objects.filter(pk__in=game_pks, game_date__gt=timezone.now())
+        .prefetch_related('gameodds_set', 'aigameodds_set')
+    )
+    picks = []
+    for game in games:
+        odds = next(iter(game.gameodds_set.all()), None)
+        ai_odds = next(iter(game.aigameodds_set.all()), None)
+        if odds is None or ai_odds is None:
+            continue
+        edge = calculate_edge(odds.home_ml, odds.away_ml, ai_odds.home_pct, ai_odds.away_pct)
+        if edge['bet_side'] != 'none':
+            picks.append(_pick(game, edge['bet_side'], edge['ml'], edge['edge_value'], Pick.Source.DISPLAY))
+    Pick.objects.bulk_create(picks, ignore_conflicts=True)
+    return len(picks)
+
+
+def record_email_picks(picks):
+    """
+    Store picks that went out in a digest, for games that have not started:
+    a started game may already have its close recorded, and its pick would
+    never be scored.
+    Args:
+        picks (list): dicts from utils.get_games_for_user
+    """
+    now = timezone.now()
+    Pick.objects.bulk_create(
+        [
+            _pick(p['game'], p['bet_side'], p['ml'], p['edge_value'], Pick.Source.EMAIL)
+            for p in picks if p['game'].game_date > now
+        ],
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def record_closing_lines(now=None):
+    """
+    Record the close for games that have started since the last run and fold
+    their picks into ClvAggregate.
+    Returns:
+        dict: {games, closing_lines, picks}
+    """
+    now = now or timezone.now()
+    games = list(
+        Game.objects.filter(game_date__lte=now, close_recorded=False)
+        .prefetch_related('gameodds_set')
+    )
+    closes = {}
+    for game in games:
+        for odds in game.gameodds_set.all():
+            closes[(game.game_id, odds.book_id)] = ClosingLine(
+                game_key=game.game_id, league_id=game.league_id, book_id=odds.book_id,
+                away_ml=odds.away_ml, home_ml=odds.home_ml,
+            )
+    ClosingLine.objects.bulk_create(closes.values(), ignore_conflicts=True)
+    # Games without odds are done too; there is nothing to wait for
+    Game.objects.filter(pk__in=[game.pk for game in games]).update(close_recorded=True)
+
+    # A pick is scored against its own book's close, or any book's if that
+    # book had stopped quoting the game.
+    any_book = {game_key: close for (game_key, _), close in closes.items()}
+    picks = list(Pick.objects.filter(game_key__in=any_book, clv__isnull=True))
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for pick in picks:
+        close = closes.get((pick.game_key, pick.book_id)) or any_book[pick.game_key]
+        pick.closing_ml = close.home_ml if pick.side == 'home' else close.away_ml
+        pick.clv = clv_percent(pick.ml, pick.closing_ml)
+        delta = deltas[(pick.league_id, pick.ai_id, pick.source, pick.edge_bucket)]
+        delta[0] += 1
+        delta[1] += pick.clv > 0
+        delta[2] += pick.clv
+    Pick.objects.bulk_update(picks, ['closing_ml', 'clv'])
+
+    for (league_id, ai_id, source, bucket), (count, beat, total) in deltas.items():
+        aggregate, _ = ClvAggregate.objects.get_or_create(
+            league_id=league_id, ai_id=ai_id, source=source, edge_bucket=bucket,
+        )
+        ClvAggregate.objects.filter(pk=aggregate.pk).update(
+            picks=F('picks') + count, beat_close=F('beat_close') + beat, clv_sum=F('clv_sum') + total,
+        )
+
+    return {'games': len(games), 'closing_lines': len(closes), 'picks': len(picks)}
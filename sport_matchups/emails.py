@@ -1,7 +1,22 @@
+import hashlib
+import json
+
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from django.urls import reverse
 
+def digest_fingerprint(games):
+    """
+    Identifies the picks a digest would contain: same games, sides, prices
+    and (whole-dollar) stakes give the same fingerprint.
+    """
+    picks = sorted(
+        (g["game"].game_id, g["bet_side"], g["ml"], round(g["wager"]))
+        for g in games[:5] if g["bet_side"] != "none"
+    )
+    return hashlib.md5(json.dumps(picks).encode()).hexdigest()
+
+
 def send_user_email(user, games):
     if not games:
         return False
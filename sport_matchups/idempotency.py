@@ -0,0 +1,120 @@
+# idempotency.py
+"""
+Idempotency-Key support for the ingest endpoints.
+
+A client that times out and retries sends the same Idempotency-Key header;
+the first response is stored and replayed for the retry without touching the
+data tables. Keys are scoped to the authenticated user, expire after
+IDEMPOTENCY_KEY_TTL, and may not be reused for a different request body.
+
+While the first request runs its key has no status_code and retries get
+409. A key still in that state after IDEMPOTENCY_IN_PROGRESS_LEASE belongs
+to a request whose worker was killed, so the next retry takes it over and
+processes the request instead of waiting out the TTL.
+"""
+import hashlib
+import json
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import record_cache
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+logger = logging.getLogger(__name__)
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def replay(record, digest):
+    """Response for a repeated key."""
+    if record.request_hash != digest:
+        return Response({"error": f"{HEADER} was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if record.status_code is None:
+        return Response({"error": "A request with this key is still being processed"},
+                        status=status.HTTP_409_CONFLICT)
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def abandoned(record, digest):
+    """Whether ``record`` is an in-progress key for this request whose worker died."""
+    lease = timezone.now() - settings.IDEMPOTENCY_IN_PROGRESS_LEASE
+    return record.status_code is None and record.request_hash == digest and record.created_at < lease
+
+
+def take_over(record):
+    """Restart the lease on an abandoned key; False if another retry got it first."""
+    now = timezone.now()
+    taken = IdempotencyKey.objects.filter(
+        pk=record.pk, status_code__isnull=True, created_at=record.created_at,
+    ).update(created_at=now)
+    if taken:
+        record.created_at = now
+        logger.warning("Taking over abandoned %s %s", HEADER, record.key)
+    return bool(taken)
+
+
+def idempotent(endpoint):
+    """
+    Decorate a DRF view method so requests carrying an Idempotency-Key are
+    processed at most once per key.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(self, request, *args, **kwargs)
+            if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+                return Response({"error": f"{HEADER} is too long"}, status=status.HTTP_400_BAD_REQUEST)
+
+            digest = request_hash(request)
+            expired = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+            keys = IdempotencyKey.objects.filter(user=request.user)
+
+            record = keys.filter(key=key, created_at__gte=expired).first()
+            record_cache('idempotency', record is not None)
+            if record is not None:
+                if not abandoned(record, digest):
+                    return replay(record, digest)
+                if not take_over(record):
+                    # Another retry took it over first and is processing it.
+                    return replay(keys.filter(pk=record.pk).first() or record, digest)
+            else:
+                # New key: clear this user's expired ones (including this key's) first.
+                keys.filter(created_at__lt=expired).delete()
+                try:
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(
+                            user=request.user, key=key, endpoint=endpoint, request_hash=digest,
+                        )
+                except IntegrityError:
+                    # A concurrent request claimed the key first.
+                    return replay(keys.get(key=key), digest)
+
+            try:
+                response = view(self, request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            if response.status_code >= 500:
+                # Let the client retry server errors for real.
+                record.delete()
+            else:
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=['status_code', 'response'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,84 @@
+# ingest.py
+"""
+Concurrency for the ingest endpoints: a slate post is split by league and
+each league is written in its own transaction.
+
+Every league transaction starts by locking that league's row
+(SELECT ... FOR UPDATE). Two posts for the same league therefore queue up
+behind each other instead of racing update_or_create, while different
+leagues proceed side by side. Code that locks several leagues (matchup
+rebuilds after team stats) takes them in ascending id order, so lock waits
+can never form a cycle.
+
+On PostgreSQL the leagues of one post are also written concurrently, one
+thread and connection each (up to INGEST_WORKERS). SQLite has a single
+writer for the whole file, so there the leagues run one after another;
+the connection opens write transactions with BEGIN IMMEDIATE
+(settings.DATABASES) so concurrent requests wait on the busy timeout for
+the write lock up front instead of failing mid-transaction.
+"""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .models import League
+
+
+def parallel_ingest():
+    """
+    Whether league partitions may run at the same time on this database.
+    Not inside an outer transaction: other threads' connections could not
+    see its writes, and it would no longer be one unit of work.
+    """
+    return connection.vendor == 'postgresql' and not connection.in_atomic_block
+
+
+def lock_leagues(league_ids):
+    """
+    Lock league rows until the surrounding transaction ends, in id order.
+    Skipped on SQLite, where the transaction already holds the write lock.
+    """
+    if not connection.features.has_select_for_update:
+        return
+    list(League.objects.select_for_update().filter(pk__in=league_ids).order_by('pk').values_list('pk'))
+
+
+def partition(items, key):
+    """{key(item): [items]} keeping the order of items within each group."""
+    groups = defaultdict(list)
+    for item in items:
+        groups[key(item)].append(item)
+    return groups
+
+
+def league_key(game):
+    """
+    The league a posted game is grouped under: its leagueId if that is a
+    plain string or number, else None (reported as a per-game error).
+    """
+    league = game.get('leagueId') if isinstance(game, dict) else None
+    return league if isinstance(league, (str, int)) and not isinstance(league, bool) else None
+
+
+def _in_thread(handler, league, items):
+    try:
+        return handler(league, items)
+    finally:
+        # Each worker thread opened its own connection; don't leak it.
+        connections.close_all()
+
+
+def run_by_league(groups, handler):
+    """
+    Call ``handler(league, items)`` for every group of ``partition()``.
+    Returns:
+        list of handler results, in group order
+    """
+    if len(groups) < 2 or not parallel_ingest():
+        return [handler(league, items) for league, items in groups.items()]
+    workers = min(len(groups), settings.INGEST_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as pool:
+        futures = [pool.submit(_in_thread, handler, league, items) for league, items in groups.items()]
+        return [future.result() for future in futures]
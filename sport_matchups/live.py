@@ -0,0 +1,110 @@
+# live.py
+"""
+Live odds push over Server-Sent Events.
+
+Ingest hands the games it just committed to ``publish_odds``, which diffs
+each card's odds/edge against what was last pushed and fans the changes out
+to every connected ``odds_stream`` client. Each client gets a bounded queue;
+one that falls too far behind is told to resync instead of holding memory
+for it.
+
+The broadcaster lives in the process, so ingest and SSE clients must share
+a process (e.g. a single uvicorn worker serving both). Other workers'
+clients still pick up changes from the slate snapshot on their next load.
+"""
+import asyncio
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Messages buffered per client before it is asked to resync.
+CLIENT_QUEUE_SIZE = 64
+
+RESYNC = {'type': 'resync'}
+
+
+def odds_delta(card):
+    """The fields of a game card that live updates patch."""
+    return {
+        'game_id': card['game_id'],
+        'edge': round(card['edge'], 2),
+        'away_ml': card['game_odds']['away_ml'],
+        'home_ml': card['game_odds']['home_ml'],
+        'spread': card['game_odds']['spread'],
+        'away_pct': card['ai_odds']['away_pct'],
+        'home_pct': card['ai_odds']['home_pct'],
+    }
+
+
+class OddsBroadcaster:
+    """
+    Fan-out from one publisher to many SSE clients.
+
+    ``publish`` may be called from any thread (ingest runs in a sync view);
+    delivery happens on the event loop the clients are attached to.
+    """
+
+    def __init__(self, queue_size=CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.clients = set()
+        self.loop = None
+        self.last_sent = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        """Register a client; must be called on the serving event loop."""
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    def changed(self, deltas):
+        """Drop deltas identical to what was last pushed for the game."""
+        with self.lock:
+            fresh = [d for d in deltas if self.last_sent.get(d['game_id']) != d]
+            self.last_sent.update((d['game_id'], d) for d in fresh)
+        return fresh
+
+    def publish(self, message):
+        if self.clients and self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _fan_out(self, message):
+        for queue in list(self.clients):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind to patch; drop its backlog and make it reload.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+
+broadcaster = OddsBroadcaster()
+
+
+def publish_odds(game_pks):
+    """Push odds/edge changes for the given games to connected clients."""
+    if not broadcaster.clients:
+        # Nobody to diff against; new clients start from a fresh page.
+        broadcaster.last_sent.clear()
+        return 0
+
+    from .reference import reference
+    from .views import build_game_card, feed_queryset
+
+    ref = reference()
+    cards = (build_game_card(game, ref) for game in feed_queryset().filter(pk__in=game_pks))
+    deltas = broadcaster.changed([odds_delta(card) for card in cards if card])
+    if deltas:
+        broadcaster.publish({'type': 'odds', 'games': deltas})
+    return len(deltas)
+
+
+def sse_message(message):
+    """Encode a broadcaster message as an SSE frame."""
+    return f"event: {message['type']}\ndata: {json.dumps(message, cls=DjangoJSONEncoder)}\n\n"
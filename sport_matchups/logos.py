@@ -0,0 +1,64 @@
+# logos.py
+"""
+Org logo URLs.
+
+Resolving a logo through the manifest storage is a dict lookup plus URL
+building, so the full org_id -> URLs map is built once per process instead of
+twice per game on every request.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.templatetags.static import static
+
+LOGO_DIR = 'images/logos'
+LOGO_SOURCE_DIR = Path(__file__).resolve().parent / 'static' / LOGO_DIR
+
+# Logos render at 50-60px; the second size covers 2x screens.
+VARIANT_SIZES = (60, 120)
+
+
+def variant_path(org_id, size, ext):
+    return f'{LOGO_DIR}/{size}/{org_id}.{ext}'
+
+
+def _has_variants(org_id):
+    root = Path(settings.GENERATED_STATIC_ROOT)
+    return all((root / variant_path(org_id, size, 'webp')).exists() for size in VARIANT_SIZES)
+
+
+def _plain_logo(org_id):
+    try:
+        src = static(f'{LOGO_DIR}/{org_id}.png')
+    except ValueError:
+        # Not in the manifest (collectstatic predates the file)
+        src = ''
+    return {'src': src, 'srcset': '', 'webp_srcset': ''}
+
+
+def _build_logo(org_id):
+    if not _has_variants(org_id):
+        return _plain_logo(org_id)
+
+    small, large = VARIANT_SIZES
+    try:
+        return {
+            'src': static(variant_path(org_id, small, 'png')),
+            'srcset': f"{static(variant_path(org_id, small, 'png'))} 1x, {static(variant_path(org_id, large, 'png'))} 2x",
+            'webp_srcset': f"{static(variant_path(org_id, small, 'webp'))} 1x, {static(variant_path(org_id, large, 'webp'))} 2x",
+        }
+    except ValueError:
+        # Variants were generated after the last collectstatic
+        return _plain_logo(org_id)
+
+
+@lru_cache(maxsize=None)
+def logo_urls():
+    """Map every org_id with a logo file to its {src, srcset, webp_srcset} URLs."""
+    return {path.stem: _build_logo(path.stem) for path in LOGO_SOURCE_DIR.glob('*.png')}
+
+
+def team_logo(org_id):
+    """Logo URLs for an organization, or empty URLs if it has no logo file."""
+    return logo_urls().get(str(org_id), {'src': '', 'srcset': '', 'webp_srcset': ''})
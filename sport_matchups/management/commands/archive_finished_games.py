@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from sport_matchups.purge import archive_finished_games
+from sport_matchups.snapshot import publish_slate_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Moves finished games and their odds into the archive tables in batches. '
+            'Run on a schedule (e.g. hourly cron); with --before it also backfills existing history.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='ISO datetime cutoff (default: now - ARCHIVE_AFTER)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Games moved per transaction')
+
+    def handle(self, *args, **options):
+        before = parse_datetime(options['before']) if options['before'] else None
+        counts = archive_finished_games(before=before, chunk_size=options['chunk_size'])
+        if counts['Game']:
+            publish_slate_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {counts['archived']} games, removed {counts['Game']} from the live tables"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from sport_matchups.backtest import load_history, parse_grid, run_backtest
+
+
+class Command(BaseCommand):
+    help = 'Replays stored odds and AI probabilities for finished games across a grid of strategy parameters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-edge', default='0:15:0.5', help='Edge grid, e.g. "5", "2.5,5,7.5" or "0:15:0.5"')
+        parser.add_argument('--kelly', default='0.25,0.5,1', help='Kelly fraction grid, same syntax as --min-edge')
+        parser.add_argument('--bankroll', type=float, default=1000)
+        parser.add_argument('--league', action='append', help='Limit to a league (repeatable)')
+        parser.add_argument('--ai', help='Use probabilities from this AI only')
+        parser.add_argument('--start', help='ISO datetime lower bound')
+        parser.add_argument('--end', help='ISO datetime upper bound')
+        parser.add_argument('--top', type=int, default=20, help='Rows to print')
+
+    def handle(self, *args, **options):
+        try:
+            min_edges, kelly_fractions = parse_grid(options['min_edge']), parse_grid(options['kelly'])
+        except ValueError as e:
+            raise CommandError(e)
+        history = load_history(
+            leagues=options['league'],
+            start=parse_datetime(options['start']) if options['start'] else None,
+            end=parse_datetime(options['end']) if options['end'] else None,
+            ai=options['ai'],
+        )
+        results = run_backtest(history, min_edges, kelly_fractions, options['bankroll'])
+        self.stdout.write(f"{len(history['game_date'])} finished games, {len(results)} parameter combinations")
+        self.stdout.write(f"{'min_edge':>8} {'kelly':>6} {'bets':>6} {'wins':>6} {'final':>12} {'roi%':>8} {'max_dd%':>8}")
+        for r in results[:options['top']]:
+            self.stdout.write(
+                f"{r['min_edge']:>8.2f} {r['kelly_fraction']:>6.2f} {r['bets']:>6} {r['wins']:>6} "
+                f"{r['final_bankroll']:>12.2f} {r['roi']:>8.2f} {r['max_drawdown']:>8.2f}"
+            )
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from sport_matchups.logos import LOGO_SOURCE_DIR, VARIANT_SIZES, variant_path
+
+
+class Command(BaseCommand):
+    help = 'Generates downscaled PNG/WebP logo variants for collectstatic to pick up (run before collectstatic)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants even if they are up to date')
+
+    def handle(self, *args, **options):
+        root = Path(settings.GENERATED_STATIC_ROOT)
+        built = skipped = 0
+        source_bytes = variant_bytes = 0
+
+        for src in sorted(LOGO_SOURCE_DIR.glob('*.png')):
+            source_bytes += src.stat().st_size
+            outputs = [
+                (size, root / variant_path(src.stem, size, ext))
+                for size in VARIANT_SIZES for ext in ('png', 'webp')
+            ]
+            if not options['force'] and all(
+                out.exists() and out.stat().st_mtime >= src.stat().st_mtime for _, out in outputs
+            ):
+                skipped += 1
+            else:
+                with Image.open(src) as img:
+                    img = img.convert('RGBA')
+                    for size, out in outputs:
+                        out.parent.mkdir(parents=True, exist_ok=True)
+                        thumb = img.copy()
+                        thumb.thumbnail((size, size), Image.LANCZOS)
+                        if out.suffix == '.webp':
+                            thumb.save(out, 'WEBP', quality=80, method=4)
+                        else:
+                            # Palette PNGs are ~half the size of RGBA ones at logo sizes.
+                            thumb.quantize(256, method=Image.Quantize.FASTOCTREE).save(out, 'PNG', optimize=True)
+                built += 1
+
+            small = VARIANT_SIZES[0]
+            variant_bytes += (root / variant_path(src.stem, small, 'webp')).stat().st_size
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Logo variants: {built} built, {skipped} up to date. '
+            f'{VARIANT_SIZES[0]}px WebP set is {variant_bytes // 1024} KB vs {source_bytes // 1024} KB of originals.'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sport_matchups.snapshot import publish_slate_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Publishes the static JSON/HTML snapshot of the current slate (ingest does this automatically)'
+
+    def handle(self, *args, **options):
+        pointer = publish_slate_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Published {pointer['count']} games to {pointer['json']}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from sport_matchups.purge import purge_past_games
+
+
+class Command(BaseCommand):
+    help = 'Deletes games that have already started, in small primary-key chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='ISO datetime cutoff (default: now)')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--archive', action='store_true', help='Copy games and odds into the archive tables first')
+
+    def handle(self, *args, **options):
+        before = parse_datetime(options['before']) if options['before'] else None
+        counts = purge_past_games(before=before, chunk_size=options['chunk_size'], archive=options['archive'])
+        summary = ', '.join(f'{name}: {count}' for name, count in sorted(counts.items())) or 'nothing to delete'
+        self.stdout.write(self.style.SUCCESS(f'Purged past games ({summary})'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from sport_matchups.clv import record_closing_lines
+from sport_matchups.models import ClvAggregate
+
+
+class Command(BaseCommand):
+    help = ('Records closing lines for games that have started and adds their picks to the CLV totals. '
+            'Run every few minutes (e.g. cron), before archive_finished_games removes the games.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--report', action='store_true', help='Print CLV by league, AI and edge bucket')
+
+    def handle(self, *args, **options):
+        counts = record_closing_lines()
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {counts['games']} games ({counts['closing_lines']} lines), scored {counts['picks']} picks"
+        ))
+        if options['report']:
+            aggregates = ClvAggregate.objects.select_related('league', 'ai').order_by(
+                'league__name', 'ai__name', 'source', 'edge_bucket')
+            for agg in aggregates:
+                self.stdout.write(
+                    f"{agg.league.name:<6} {agg.ai.name:<10} {agg.source:<7} edge {agg.edge_bucket:>5.1f}+ "
+                    f"picks {agg.picks:>5}  beat close {agg.beat_close / agg.picks:>6.1%}  mean CLV {agg.mean_clv:+.2f}%"
+                )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sport_matchups.matchups import refresh_matchups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the precomputed offense/defense matchup rows for every upcoming game'
+
+    def handle(self, *args, **options):
+        count = refresh_matchups()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed matchups for {count} upcoming games'))
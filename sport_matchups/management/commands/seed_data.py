@@ -1,11 +1,13 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from sport_matchups.models import League, Organization, Team, AI, SportsBook
+from sport_matchups.reference import invalidate_reference_data
 
 class Command(BaseCommand):
-    help = 'Seeds the database with initial League, Organization, and Team data'
+    help = 'Seeds the database with initial League, Organization, and Team data (only missing or changed rows are written)'
 
     def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
         self.stdout.write(self.style.SUCCESS('Starting database seeding...'))
 
         # League data
@@ -1086,49 +1088,83 @@ class Command(BaseCommand):
 
         try:
             with transaction.atomic():
-                # Seed Leagues
-                for data in leagues_data:
-                    league, created = League.objects.get_or_create(name=data['name'])
-                    action = 'Created' if created else 'Found'
-                    self.stdout.write(self.style.SUCCESS(f'{action} league: {league.name}'))
+                counts = {
+                    'leagues': self.seed_names(League, leagues_data),
+                    'organizations': self.seed_organizations(organizations_data),
+                }
+                counts['teams'] = self.seed_teams(teams_data)
+                counts['AIs'] = self.seed_names(AI, ai_data)
+                counts['sportsbooks'] = self.seed_names(SportsBook, book_data)
+            # bulk_create/bulk_update send no signals
+            invalidate_reference_data()
 
-                # Seed Organizations
-                for data in organizations_data:
-                    org_id = data.pop('org_id')  # Remove org_id from data to avoid passing it as a field
-                    org, created = Organization.objects.get_or_create(
-                        org_id=org_id,
-                        defaults=data
-                    )
-                    action = 'Created' if created else 'Found'
-                    self.stdout.write(self.style.SUCCESS(f'{action} organization: {org.first_name} {org.last_name}'))
+            for label, (created, updated) in counts.items():
+                self.stdout.write(self.style.SUCCESS(f'{label}: {created} created, {updated} updated'))
+            self.stdout.write(self.style.SUCCESS('Database seeding completed successfully!'))
 
-                # Seed Teams
-                for data in teams_data:
-                    league = League.objects.get(name=data['league'])
-                    org = Organization.objects.get(org_id=data['org_id'])
-                    team, created = Team.objects.get_or_create(
-                        league=league,
-                        organization=org
-                    )
-                    action = 'Created' if created else 'Found'
-                    self.stdout.write(self.style.SUCCESS(f'{action} team: {org.first_name} {org.last_name} ({league.name})'))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error during seeding: {str(e)}'))
+            raise
 
-                # Seed AI
-                for data in ai_data:
-                    ai, created = AI.objects.get_or_create(name=data['name'])
-                    action = 'Created' if created else 'Found'
-                    self.stdout.write(self.style.SUCCESS(f'{action} AI: {ai.name}'))
+    def log_row(self, action, label):
+        """Per-row output is only shown with -v 2 so deploy logs stay short."""
+        if self.verbosity > 1:
+            self.stdout.write(self.style.SUCCESS(f'{action} {label}'))
 
+    def seed_names(self, model, rows):
+        """
+        Create any name-keyed rows (League, AI, SportsBook) that are missing.
+        Returns:
+            tuple: (created, updated) counts
+        """
+        existing = set(model.objects.values_list('name', flat=True))
+        missing = [model(name=data['name']) for data in rows if data['name'] not in existing]
+        model.objects.bulk_create(missing)
+        for obj in missing:
+            self.log_row(f'Created {model._meta.verbose_name}:', obj.name)
+        return len(missing), 0
 
-                # Seed Sportsbook
-                for data in book_data:
-                    book, created = SportsBook.objects.get_or_create(name=data['name'])
-                    action = 'Created' if created else 'Found'
-                    self.stdout.write(self.style.SUCCESS(f'{action} SportsBook: {book.name}'))
+    def seed_organizations(self, rows):
+        """
+        Diff the embedded organizations against the table in one query and
+        bulk create/update only the rows that are missing or changed.
+        """
+        fields = ['abrv', 'first_name', 'last_name', 'color_primary', 'color_secondary', 'role']
+        existing = {org.org_id: org for org in Organization.objects.only('org_id', *fields)}
 
+        to_create, to_update = [], []
+        for data in rows:
+            org_id = str(data['org_id'])
+            values = {field: data[field] for field in fields}
+            org = existing.get(org_id)
+            if org is None:
+                to_create.append(Organization(org_id=org_id, **values))
+            elif any(getattr(org, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(org, field, value)
+                to_update.append(org)
 
-            self.stdout.write(self.style.SUCCESS('Database seeding completed successfully!'))
+        Organization.objects.bulk_create(to_create)
+        Organization.objects.bulk_update(to_update, fields)
+        for org in to_create:
+            self.log_row('Created organization:', f'{org.first_name} {org.last_name}')
+        for org in to_update:
+            self.log_row('Updated organization:', f'{org.first_name} {org.last_name}')
+        return len(to_create), len(to_update)
 
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Error during seeding: {str(e)}'))
-            raise
+    def seed_teams(self, rows):
+        """Create the (league, organization) pairs that do not exist yet."""
+        leagues = dict(League.objects.values_list('name', 'id'))
+        orgs = dict(Organization.objects.values_list('org_id', 'id'))
+        existing = set(Team.objects.values_list('league_id', 'organization_id'))
+
+        to_create = []
+        for data in rows:
+            key = (leagues[data['league']], orgs[str(data['org_id'])])
+            if key not in existing:
+                existing.add(key)
+                to_create.append(Team(league_id=key[0], organization_id=key[1]))
+                self.log_row('Created team:', f"{data['abrv']} ({data['league']})")
+
+        Team.objects.bulk_create(to_create)
+        return len(to_create), 0
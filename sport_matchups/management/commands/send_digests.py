@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from sport_matchups.models import EmailRun
+from sport_matchups.notifications import start_email_run, work_email_run
+
+
+class Command(BaseCommand):
+    help = ('Works on the open digest email run (opening one if needed) until no shard is left to claim. '
+            'Start several of these at once to send in parallel; each subscriber is emailed once per run.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard-size', type=int, help='Subscribers per shard for a new run (default EMAIL_SHARD_SIZE)')
+        parser.add_argument('--status', action='store_true', help='Show the latest run\'s shards and exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            return self.status()
+        run = start_email_run(shard_size=options['shard_size'])
+        counts = work_email_run(run)
+        self.stdout.write(self.style.SUCCESS(
+            f"Run {run.pk}: {len(counts.shards)} shards, {counts.sent} sent, "
+            f"{counts.unchanged} unchanged, {counts.skipped} skipped"
+        ))
+
+    def status(self):
+        run = EmailRun.objects.order_by('-pk').first()
+        if run is None:
+            self.stdout.write("No digest runs yet")
+            return
+        if run.finished_at:
+            state = f"finished {run.finished_at:%Y-%m-%d %H:%M}"
+        else:
+            state = "open" if run.active else "abandoned"
+        self.stdout.write(f"Run {run.pk} started {run.started_at:%Y-%m-%d %H:%M}, {state}")
+        for shard in run.shards.order_by('index'):
+            self.stdout.write(
+                f"  shard {shard.index:>3} users {shard.user_id_from}-{shard.user_id_to} "
+                f"{shard.status:<7} {shard.owner or '-':<24} at user {shard.last_user_id or '-'}: "
+                f"{shard.sent} sent, {shard.unchanged} unchanged, {shard.skipped} skipped"
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from sport_matchups.warmup import import_time_report, warm_up
+
+
+class Command(BaseCommand):
+    help = 'Primes URL resolvers, templates, the static manifest, logos and the slate snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--import-report', action='store_true',
+                            help='Also report the slowest imports of fefelson.wsgi (python -X importtime)')
+        parser.add_argument('--limit', type=int, default=20, help='Modules listed in the import report')
+
+    def handle(self, *args, **options):
+        for name, count, seconds in warm_up():
+            if count is None:
+                self.stdout.write(self.style.ERROR(f'{name:<16} failed (see log)'))
+            else:
+                self.stdout.write(f'{name:<16} {count:>6}  {seconds * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS('Warmup complete'))
+
+        if options['import_report']:
+            total, rows = import_time_report(limit=options['limit'])
+            self.stdout.write(f'\nimport fefelson.wsgi: {total * 1000:.0f} ms')
+            self.stdout.write(f"{'cumulative':>12} {'self':>9}  module")
+            for cumulative, own, module in rows:
+                self.stdout.write(f'{cumulative * 1000:9.1f} ms {own * 1000:6.1f} ms  {module}')
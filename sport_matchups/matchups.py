@@ -0,0 +1,87 @@
+# matchups.py
+"""
+Precomputed offense-vs-defense matchups for upcoming games.
+
+For every off_<key>/def_<key> stat a league defines, each upcoming game gets
+one row for the away offense against the home defense and one for the home
+offense against the away defense. Rows are rebuilt only for the games whose
+teams (or the games themselves) changed.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .ingest import lock_leagues
+from .models import Game, GameMatchup, Stat, TeamStat
+
+
+def stat_keys_by_league(league_ids):
+    """{league_id: sorted keys} for stats named off_<key> or def_<key>."""
+    keys = {}
+    for league_id, name in Stat.objects.filter(league_id__in=league_ids).values_list('league_id', 'name'):
+        if name.startswith(('off_', 'def_')):
+            keys.setdefault(league_id, set()).add(name[4:])
+    return {league_id: sorted(k) for league_id, k in keys.items()}
+
+
+def build_matchups(game, keys, stats):
+    """
+    Matchup rows for one game.
+    Args:
+        game (tuple): (pk, away_team_id, home_team_id)
+        keys (list): Stat keys defined for the game's league
+        stats (dict): {(team_id, stat name): (score, color)}
+    """
+    game_pk, away_id, home_id = game
+    rows = []
+    for offense, off_team, def_team in (("away", away_id, home_id), ("home", home_id, away_id)):
+        for key in keys:
+            off_score, off_color = stats.get((off_team, f"off_{key}"), (None, ""))
+            def_score, def_color = stats.get((def_team, f"def_{key}"), (None, ""))
+            rows.append(GameMatchup(
+                game_id=game_pk, offense=offense, stat_key=key,
+                off_score=off_score, off_color=off_color,
+                def_score=def_score, def_color=def_color,
+                differential=off_score - def_score if off_score is not None and def_score is not None else None,
+            ))
+    return rows
+
+
+def refresh_matchups(game_ids=None, team_ids=None):
+    """
+    Rebuild matchup rows for upcoming games that are in ``game_ids`` or
+    involve a team in ``team_ids``. With neither given, every upcoming game
+    is rebuilt.
+    Returns:
+        int: games refreshed
+    """
+    games = Game.objects.filter(game_date__gte=timezone.now())
+    if game_ids is not None or team_ids is not None:
+        affected = Q(pk__in=game_ids or [])
+        if team_ids:
+            affected |= Q(away_team_id__in=team_ids) | Q(home_team_id__in=team_ids)
+        games = games.filter(affected)
+
+    games = list(games.values_list('pk', 'league_id', 'away_team_id', 'home_team_id'))
+    if not games:
+        return 0
+
+    keys = stat_keys_by_league({g[1] for g in games})
+    teams = {g[2] for g in games} | {g[3] for g in games}
+    stats = {
+        (team_id, name): (score, color)
+        for team_id, name, score, color in TeamStat.objects.filter(team_id__in=teams).values_list(
+            'team_id', 'stat__name', 'score', 'color'
+        )
+    }
+
+    rows = []
+    for pk, league_id, away_id, home_id in games:
+        rows.extend(build_matchups((pk, away_id, home_id), keys.get(league_id, []), stats))
+
+    with transaction.atomic():
+        # Serialise with game ingest for the same leagues (see ingest.py)
+        lock_leagues({g[1] for g in games})
+        GameMatchup.objects.filter(game_id__in=[g[0] for g in games]).delete()
+        GameMatchup.objects.bulk_create(rows, batch_size=1000)
+    return len(games)
@@ -0,0 +1,88 @@
+# metrics.py
+"""
+Prometheus counters and histograms for ingest, email and page views.
+
+Under gunicorn every worker has its own memory, so gunicorn.conf.py points
+PROMETHEUS_MULTIPROC_DIR at a shared directory before anything is imported:
+each process then writes its samples to mmap'd files there and the /metrics/
+view sums them. Without that variable (runserver, tests, a single uvicorn
+process) the default in-process registry is used.
+"""
+import os
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter,
+                               Histogram, REGISTRY, generate_latest, multiprocess)
+
+INGEST_ROWS = Counter(
+    'fefelson_ingest_rows_total', 'Rows received by the ingest endpoints',
+    ['endpoint', 'outcome'],
+)
+INGEST_SECONDS = Histogram(
+    'fefelson_ingest_seconds', 'Time spent handling one ingest request',
+    ['endpoint'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+EMAILS = Counter(
+    'fefelson_emails_total', 'Digest emails handled by the notification job',
+    ['outcome'],
+)
+EMAIL_JOB_SECONDS = Histogram(
+    'fefelson_email_job_seconds', 'Duration of one notification job run',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600),
+)
+VIEW_SECONDS = Histogram(
+    'fefelson_view_seconds', 'Page view latency',
+    ['view'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'fefelson_cache_requests_total', 'Cache lookups by cache and result',
+    ['cache', 'result'],
+)
+
+
+def record_ingest(endpoint, **outcomes):
+    """Count ingest rows, e.g. record_ingest('games', created=3, updated=10, error=1)."""
+    for outcome, count in outcomes.items():
+        if count:
+            INGEST_ROWS.labels(endpoint, outcome).inc(count)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def timed(histogram, *labels):
+    """Observe a (sync or async) function's duration in ``histogram``."""
+    metric = histogram.labels(*labels) if labels else histogram
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metric.observe(time.perf_counter() - start)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    metric.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def exposition():
+    """(body, content type) in the Prometheus text format, summed across workers."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
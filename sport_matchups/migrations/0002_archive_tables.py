@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.CharField(max_length=100, unique=True)),
+                ('game_date', models.DateTimeField(db_index=True)),
+                ('away_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sport_matchups.team')),
+                ('home_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sport_matchups.team')),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.league')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedAIGameOdds',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('away_pct', models.FloatField()),
+                ('home_pct', models.FloatField()),
+                ('ai', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.ai')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_odds', to='sport_matchups.archivedgame')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedGameOdds',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('away_ml', models.IntegerField()),
+                ('home_ml', models.IntegerField()),
+                ('spread', models.FloatField()),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.sportsbook')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='odds', to='sport_matchups.archivedgame')),
+            ],
+        ),
+    ]
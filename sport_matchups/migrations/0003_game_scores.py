@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0002_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedgame',
+            name='away_score',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedgame',
+            name='home_score',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='away_score',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='home_score',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+def copy_scores(apps, schema_editor):
+    # Client-computed scores are the best raw values we have for old rows.
+    TeamStat = apps.get_model('sport_matchups', 'TeamStat')
+    TeamStat.objects.update(value=models.F('score'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0003_game_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stat',
+            name='higher_is_better',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='teamstat',
+            name='value',
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunPython(copy_scores, migrations.RunPython.noop),
+    ]
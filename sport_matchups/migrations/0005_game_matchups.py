@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0004_team_stat_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameMatchup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offense', models.CharField(choices=[('away', 'Away'), ('home', 'Home')], max_length=4)),
+                ('stat_key', models.CharField(max_length=30)),
+                ('off_score', models.FloatField(null=True)),
+                ('off_color', models.CharField(blank=True, max_length=30)),
+                ('def_score', models.FloatField(null=True)),
+                ('def_color', models.CharField(blank=True, max_length=30)),
+                ('differential', models.FloatField(null=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matchups', to='sport_matchups.game')),
+            ],
+            options={
+                'unique_together': {('game', 'offense', 'stat_key')},
+            },
+        ),
+    ]
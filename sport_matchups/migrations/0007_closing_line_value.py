@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0006_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClosingLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_key', models.CharField(max_length=100)),
+                ('away_ml', models.IntegerField()),
+                ('home_ml', models.IntegerField()),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.sportsbook')),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.league')),
+            ],
+            options={
+                'unique_together': {('game_key', 'book')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ClvAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('display', 'Displayed'), ('email', 'Emailed')], max_length=7)),
+                ('edge_bucket', models.FloatField()),
+                ('picks', models.IntegerField(default=0)),
+                ('beat_close', models.IntegerField(default=0)),
+                ('clv_sum', models.FloatField(default=0)),
+                ('ai', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.ai')),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.league')),
+            ],
+            options={
+                'unique_together': {('league', 'ai', 'source', 'edge_bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Pick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_key', models.CharField(max_length=100)),
+                ('source', models.CharField(choices=[('display', 'Displayed'), ('email', 'Emailed')], max_length=7)),
+                ('side', models.CharField(max_length=4)),
+                ('ml', models.IntegerField()),
+                ('edge', models.FloatField()),
+                ('edge_bucket', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('closing_ml', models.IntegerField(null=True)),
+                ('clv', models.FloatField(null=True)),
+                ('ai', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.ai')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.sportsbook')),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sport_matchups.league')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game_key'], name='sport_match_game_ke_b3907e_idx')],
+                'unique_together': {('game_key', 'source', 'side')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0007_closing_line_value'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='startingpitcher',
+            unique_together={('game', 'team')},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:07
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_local_date(apps, schema_editor):
+    Game = apps.get_model('sport_matchups', 'Game')
+    games = []
+    for game in Game.objects.only('game_date').iterator(chunk_size=1000):
+        game.local_date = timezone.localdate(game.game_date)
+        games.append(game)
+    Game.objects.bulk_update(games, ['local_date'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0008_starting_pitcher_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='local_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_local_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['local_date', 'game_date'], name='sport_match_local_d_76069f_idx'),
+        ),
+    ]
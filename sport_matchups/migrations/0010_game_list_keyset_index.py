@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0009_game_local_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_date', 'id'], name='sport_match_game_da_d926a2_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0010_game_list_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestLog',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='digest', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('sent_on', models.DateField()),
+                ('sent_at', models.DateTimeField()),
+            ],
+        ),
+    ]
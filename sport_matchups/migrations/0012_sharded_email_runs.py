@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0011_digest_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('active', models.BooleanField(default=True, editable=False, null=True, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='digestlog',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='sport_matchups.emailrun'),
+        ),
+        migrations.CreateModel(
+            name='EmailShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField()),
+                ('user_id_from', models.IntegerField()),
+                ('user_id_to', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('claimed', 'Claimed'), ('done', 'Done')], default='pending', max_length=7)),
+                ('owner', models.CharField(blank=True, max_length=100)),
+                ('lease_expires', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('claims', models.IntegerField(default=0)),
+                ('last_user_id', models.IntegerField(blank=True, null=True)),
+                ('sent', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('unchanged', models.IntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='sport_matchups.emailrun')),
+            ],
+            options={
+                'unique_together': {('run', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+def mark_closed_games(apps, schema_editor):
+    Game = apps.get_model('sport_matchups', 'Game')
+    ClosingLine = apps.get_model('sport_matchups', 'ClosingLine')
+    Game.objects.filter(game_id__in=ClosingLine.objects.values('game_key')).update(close_recorded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_matchups', '0012_sharded_email_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='close_recorded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_closed_games, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
 
 class League(models.Model):
@@ -38,8 +40,34 @@ class Game(models.Model):
     league = models.ForeignKey(League, on_delete=models.CASCADE)
     game_id = models.CharField(max_length=100, unique=True)
     game_date = models.DateTimeField()
+    # Calendar day of game_date in TIME_ZONE, kept in step by save()
+    local_date = models.DateField(null=True, editable=False)
     away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="away_games")
     home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="home_games")
+    # Final score, filled in once the game is finished
+    away_score = models.IntegerField(null=True, blank=True)
+    home_score = models.IntegerField(null=True, blank=True)
+    # Set by clv.record_closing_lines once it has handled the started game,
+    # whether or not there were odds to close
+    close_recorded = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["local_date", "game_date"]),
+            # Keyset pagination of the game list
+            models.Index(fields=["game_date", "id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Ingest hands game_date over as an ISO string
+        game_date = self._meta.get_field("game_date").to_python(self.game_date)
+        if timezone.is_naive(game_date):
+            game_date = timezone.make_aware(game_date)
+        self.local_date = timezone.localdate(game_date)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "game_date" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "local_date"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.away_team} vs {self.home_team} ({self.game_date})"
@@ -52,6 +80,9 @@ class StartingPitcher(models.Model):
     throws = models.CharField(max_length=1)
     player_id = models .IntegerField()
 
+    class Meta:
+        unique_together = ("game", "team")
+
     def __str__(self):
         return f"{self.team} -- {self.name} {self.throws}"
 
@@ -96,10 +127,41 @@ class AIGameOdds(models.Model):
 
 
 
+class ArchivedGame(models.Model):
+    """Compact copy of a finished Game, kept after the live row is purged."""
+    game_id = models.CharField(max_length=100, unique=True)
+    league = models.ForeignKey(League, on_delete=models.CASCADE)
+    game_date = models.DateTimeField(db_index=True)
+    away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    away_score = models.IntegerField(null=True, blank=True)
+    home_score = models.IntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.game_id} ({self.game_date})"
+
+
+class ArchivedGameOdds(models.Model):
+    game = models.ForeignKey(ArchivedGame, on_delete=models.CASCADE, related_name="odds")
+    book = models.ForeignKey(SportsBook, on_delete=models.CASCADE)
+    away_ml = models.IntegerField()
+    home_ml = models.IntegerField()
+    spread = models.FloatField()
+
+
+class ArchivedAIGameOdds(models.Model):
+    game = models.ForeignKey(ArchivedGame, on_delete=models.CASCADE, related_name="ai_odds")
+    ai = models.ForeignKey(AI, on_delete=models.CASCADE)
+    away_pct = models.FloatField()
+    home_pct = models.FloatField()
+
+
 class Stat(models.Model):
     """A stat definition (like OBP, SLG, HR%)."""
     league = models.ForeignKey(League, on_delete=models.CASCADE)
     name = models.CharField(max_length=30)
+    # False for stats where a lower value ranks better (e.g. turnovers)
+    higher_is_better = models.BooleanField(default=True)
 
     def __str__(self):
         return f"{self.league} {self.name}"
@@ -109,6 +171,9 @@ class TeamStat(models.Model):
     """Links a team to a stat definition with its specific value."""
     team = models.ForeignKey(Team, on_delete=models.CASCADE)
     stat = models.ForeignKey(Stat, on_delete=models.CASCADE)
+    value = models.FloatField(null=True)
+    # League-wide percentile rank of value (0-1) and its color bucket,
+    # computed server-side by rankings.rank_team_stats
     score = models.FloatField()
     color = models.CharField(max_length=30)
     label = models.CharField(max_length=30)
@@ -120,6 +185,125 @@ class TeamStat(models.Model):
         return f"{self.team} - {self.stat.name}"
 
 
+class GameMatchup(models.Model):
+    """
+    One side's offense against the other side's defense for a stat key
+    (off_<key> vs def_<key>), precomputed by matchups.refresh_matchups.
+    """
+    class Offense(models.TextChoices):
+        AWAY = "away", "Away"
+        HOME = "home", "Home"
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="matchups")
+    offense = models.CharField(max_length=4, choices=Offense.choices)
+    stat_key = models.CharField(max_length=30)
+    off_score = models.FloatField(null=True)
+    off_color = models.CharField(max_length=30, blank=True)
+    def_score = models.FloatField(null=True)
+    def_color = models.CharField(max_length=30, blank=True)
+    # off_score - def_score; positive favors the offense
+    differential = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ("game", "offense", "stat_key")
+
+    def __str__(self):
+        return f"{self.game.game_id} {self.offense} offense {self.stat_key}: {self.differential}"
+
+
+class ClosingLine(models.Model):
+    """
+    A book's moneyline when the game started. Keyed by game_id
+    rather than a foreign key so it survives archiving.
+    """
+    game_key = models.CharField(max_length=100)
+    league = models.ForeignKey(League, on_delete=models.CASCADE)
+    book = models.ForeignKey(SportsBook, on_delete=models.CASCADE)
+    away_ml = models.IntegerField()
+    home_ml = models.IntegerField()
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("game_key", "book")
+
+    def __str__(self):
+        return f"{self.game_key} close {self.away_ml}/{self.home_ml}"
+
+
+class Pick(models.Model):
+    """
+    A pick shown on the site or emailed, at the price it was offered.
+    clv is filled in by clv.record_closing_lines once the game starts.
+    """
+    class Source(models.TextChoices):
+        DISPLAY = "display", "Displayed"
+        EMAIL = "email", "Emailed"
+
+    game_key = models.CharField(max_length=100)
+    league = models.ForeignKey(League, on_delete=models.CASCADE)
+    ai = models.ForeignKey(AI, on_delete=models.CASCADE)
+    book = models.ForeignKey(SportsBook, on_delete=models.CASCADE)
+    source = models.CharField(max_length=7, choices=Source.choices)
+    side = models.CharField(max_length=4)
+    ml = models.IntegerField()
+    edge = models.FloatField()
+    edge_bucket = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set at the close; clv is percent better (positive) or worse than it
+    closing_ml = models.IntegerField(null=True)
+    clv = models.FloatField(null=True)
+
+    class Meta:
+        # The first time a pick is offered is the price that counts
+        unique_together = ("game_key", "source", "side")
+        indexes = [models.Index(fields=["game_key"])]
+
+    def __str__(self):
+        return f"{self.game_key} {self.side} {self.ml} ({self.source})"
+
+
+class ClvAggregate(models.Model):
+    """Running CLV totals per league, AI and edge bucket, updated incrementally."""
+    league = models.ForeignKey(League, on_delete=models.CASCADE)
+    ai = models.ForeignKey(AI, on_delete=models.CASCADE)
+    source = models.CharField(max_length=7, choices=Pick.Source.choices)
+    edge_bucket = models.FloatField()
+    picks = models.IntegerField(default=0)
+    beat_close = models.IntegerField(default=0)
+    clv_sum = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("league", "ai", "source", "edge_bucket")
+
+    @property
+    def mean_clv(self):
+        return self.clv_sum / self.picks if self.picks else 0.0
+
+    def __str__(self):
+        return f"{self.league} {self.ai} {self.source} {self.edge_bucket}+: {self.mean_clv:.2f}%"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored response for an ingest request sent with an Idempotency-Key
+    header, replayed when a client retries the same request.
+    """
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=50)
+    request_hash = models.CharField(max_length=64)
+    # Null while the first request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key}"
+
+
 class Preferences(models.Model):
     user = models.OneToOneField(
         "User",  # forward reference, since User is defined later
@@ -134,6 +318,64 @@ class Preferences(models.Model):
 
 
 
+class EmailRun(models.Model):
+    """One run of the digest job; its subscribers are split into EmailShards."""
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # True while open, NULL once finished or abandoned: the unique index
+    # allows one open run
+    active = models.BooleanField(default=True, null=True, unique=True, editable=False)
+
+    def __str__(self):
+        return f"Email run {self.pk} ({self.started_at:%Y-%m-%d %H:%M})"
+
+
+class EmailShard(models.Model):
+    """
+    A user-id range of one EmailRun. A worker owns it while its lease is
+    current; last_user_id is how far it got, so a reclaimed shard resumes.
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        CLAIMED = "claimed", "Claimed"
+        DONE = "done", "Done"
+
+    run = models.ForeignKey(EmailRun, on_delete=models.CASCADE, related_name="shards")
+    index = models.IntegerField()
+    # Inclusive range of subscriber ids
+    user_id_from = models.IntegerField()
+    user_id_to = models.IntegerField()
+    status = models.CharField(max_length=7, choices=Status.choices, default=Status.PENDING)
+    owner = models.CharField(max_length=100, blank=True)
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    claims = models.IntegerField(default=0)
+    # Progress
+    last_user_id = models.IntegerField(null=True, blank=True)
+    sent = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("run", "index")
+
+    def __str__(self):
+        return f"Run {self.run_id} shard {self.index} ({self.status})"
+
+
+class DigestLog(models.Model):
+    """The last digest emailed to a user, so unchanged picks are not resent."""
+    user = models.OneToOneField("User", on_delete=models.CASCADE, primary_key=True, related_name="digest")
+    fingerprint = models.CharField(max_length=32)
+    # Local (TIME_ZONE) day it was sent; a new day always gets a digest
+    sent_on = models.DateField()
+    sent_at = models.DateTimeField()
+    run = models.ForeignKey(EmailRun, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    def __str__(self):
+        return f"{self.user_id} digest {self.sent_on} ({self.fingerprint[:8]})"
+
+
 class User(AbstractUser):
     send_email = models.BooleanField(default=True)
 
@@ -0,0 +1,240 @@
+# notifications.py
+"""
+The digest email job, split into shards that any number of worker
+processes can work through together.
+
+``start_email_run`` opens a run (or joins today's open one) and splits the
+subscribers into ranges of user ids (EmailShard rows). A run belongs to the
+local day it started: one still open from an earlier day is abandoned
+rather than rejoined, so a run that never finished cannot swallow the
+following days' digests. A worker claims a pending shard, or one whose
+lease ran out because its worker died, with a compare-and-swap UPDATE, so
+two workers can never own the same shard. That works the same on SQLite
+and Postgres.
+
+Each user is handled on its own. The shard's cursor (last_user_id), its
+counters and the lease renewal are written in one UPDATE that only
+matches while this worker still owns the shard. Before an email goes out
+that UPDATE moves the cursor past the user, renewing the lease; a worker
+that lost the shard fails it and sends nothing. A reclaimed shard resumes
+after the cursor, so a worker that dies mid-send leaves its user behind
+rather than mailing them twice: every subscriber gets at most one email
+per run. Once the send returns the DigestLog row, stamped with the run,
+is written and the shard's sent count goes up. EMAIL_TIMEOUT is kept well
+below the lease so a hung SMTP server cannot outlast it.
+"""
+import logging
+import os
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .clv import record_email_picks
+from .emails import digest_fingerprint, send_user_email
+from .metrics import EMAILS
+from .models import DigestLog, EmailRun, EmailShard, User
+from .utils import get_games_for_user, pick_candidates
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Another worker took the shard over (our lease had expired)."""
+
+
+@dataclass
+class Counts:
+    sent: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    shards: list = field(default_factory=list)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _finish_run(run):
+    EmailRun.objects.filter(pk=run.pk, active=True).update(finished_at=timezone.now(), active=None)
+
+
+def _today_start():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def start_email_run(shard_size=None):
+    """
+    Today's open run, or a new one split over the current subscribers. Only
+    one run is open at a time, so workers started together all join the same
+    one; a run left open from an earlier day is abandoned first.
+    Returns:
+        EmailRun
+    """
+    stale = EmailRun.objects.filter(active=True, started_at__lt=_today_start()).update(active=None)
+    if stale:
+        logger.warning("Abandoned %s unfinished email run(s) from an earlier day", stale)
+    run = current_run()
+    if run is not None:
+        return run
+    shard_size = shard_size or settings.EMAIL_SHARD_SIZE
+    user_ids = list(User.objects.filter(send_email=True).order_by('id').values_list('id', flat=True))
+    try:
+        with transaction.atomic():
+            run = EmailRun.objects.create()
+            EmailShard.objects.bulk_create([
+                EmailShard(run=run, index=i, user_id_from=chunk[0], user_id_to=chunk[-1])
+                for i, chunk in enumerate(
+                    user_ids[lo:lo + shard_size] for lo in range(0, len(user_ids), shard_size)
+                )
+            ])
+    except IntegrityError:
+        # Another worker opened a run first
+        return current_run()
+    return run
+
+
+def current_run():
+    """Today's open run, or None."""
+    return EmailRun.objects.filter(active=True, started_at__gte=_today_start()).first()
+
+
+def claim_shard(run, worker):
+    """
+    Take the next pending (or abandoned) shard of ``run``.
+    Returns:
+        EmailShard owned by ``worker`` or None when nothing is left to claim
+    """
+    while True:
+        now = timezone.now()
+        claimable = EmailShard.objects.filter(run=run).filter(
+            Q(status=EmailShard.Status.PENDING)
+            | Q(status=EmailShard.Status.CLAIMED, lease_expires__lt=now)
+        )
+        shard = claimable.order_by('index').first()
+        if shard is None:
+            return None
+        lease_expires = now + settings.EMAIL_SHARD_LEASE
+        # Only one worker's UPDATE can match the row as it was read.
+        won = claimable.filter(pk=shard.pk, status=shard.status, owner=shard.owner).update(
+            status=EmailShard.Status.CLAIMED, owner=worker, lease_expires=lease_expires,
+            heartbeat_at=now, claims=F('claims') + 1,
+        )
+        if won:
+            shard.status, shard.owner, shard.lease_expires = EmailShard.Status.CLAIMED, worker, lease_expires
+            if shard.claims:
+                logger.warning("Reclaimed email shard %s of run %s", shard.index, run.pk)
+            return shard
+
+
+def _advance(shard, user_id=None, outcome=None):
+    """
+    Renew the lease, moving the cursor past ``user_id`` and counting
+    ``outcome`` if given. Raises LeaseLost if the shard is no longer ours.
+    """
+    now = timezone.now()
+    lease_expires = now + settings.EMAIL_SHARD_LEASE
+    changes = {'heartbeat_at': now, 'lease_expires': lease_expires}
+    if user_id is not None:
+        changes['last_user_id'] = user_id
+    if outcome:
+        changes[outcome] = F(outcome) + 1
+    updated = EmailShard.objects.filter(
+        pk=shard.pk, owner=shard.owner, status=EmailShard.Status.CLAIMED,
+    ).update(**changes)
+    if not updated:
+        raise LeaseLost(f"shard {shard.index} of run {shard.run_id}")
+    shard.lease_expires = lease_expires
+    if user_id is not None:
+        shard.last_user_id = user_id
+
+
+def process_shard(run, shard, candidates, counts, batch_size=200):
+    """Email every subscriber in the shard past its cursor."""
+    today = timezone.localdate()
+    after = shard.last_user_id if shard.last_user_id is not None else shard.user_id_from - 1
+    while True:
+        users = list(
+            User.objects.filter(send_email=True, id__gt=after, id__lte=shard.user_id_to)
+            .select_related("preferences", "digest").order_by('id')[:batch_size]
+        )
+        if not users:
+            break
+        for user in users:
+            after = user.id
+            prefs = getattr(user, "preferences", None)
+            last = getattr(user, "digest", None)
+            if last and last.run_id == run.pk:
+                # Sent by a previous owner of this shard
+                _advance(shard, user.id)
+                continue
+            if not prefs:
+                _advance(shard, user.id, 'skipped')
+                counts.skipped += 1
+                continue
+
+            games = get_games_for_user(prefs, candidates)
+            fingerprint = digest_fingerprint(games)
+            if last and last.fingerprint == fingerprint and last.sent_on == today:
+                # Same picks as the digest already sent today
+                _advance(shard, user.id, 'unchanged')
+                counts.unchanged += 1
+                continue
+
+            # Claim the user on a fresh lease before sending: from here on
+            # no other worker will pick them up in this run.
+            _advance(shard, user.id)
+            try:
+                delivered = send_user_email(user, games)
+            except Exception as e:
+                # One bad address or SMTP hiccup must not stall the shard
+                logger.error(f"Error emailing digest to user {user.id}: {e}")
+                delivered = False
+            if not delivered:
+                _advance(shard, outcome='skipped')
+                counts.skipped += 1
+                continue
+            # The email is out: log it even if the lease has been lost since
+            DigestLog.objects.update_or_create(user=user, defaults={
+                'fingerprint': fingerprint, 'sent_on': today,
+                'sent_at': timezone.now(), 'run': run,
+            })
+            counts.sent += 1
+            record_email_picks(games)
+            _advance(shard, outcome='sent')
+
+    EmailShard.objects.filter(pk=shard.pk, owner=shard.owner).update(
+        status=EmailShard.Status.DONE, lease_expires=None, heartbeat_at=timezone.now(),
+    )
+
+
+def work_email_run(run, worker=None):
+    """
+    Claim and process shards of ``run`` until none are left, then close the
+    run if every shard is done. Safe to call from many processes at once.
+    Returns:
+        Counts for the shards this worker processed
+    """
+    worker = worker or worker_name()
+    counts = Counts()
+    candidates = None
+    while (shard := claim_shard(run, worker)) is not None:
+        # Loaded once per worker, on the first shard it gets
+        candidates = pick_candidates() if candidates is None else candidates
+        before = (counts.sent, counts.skipped, counts.unchanged)
+        try:
+            process_shard(run, shard, candidates, counts)
+        except LeaseLost:
+            logger.warning("Lost the lease on email shard %s of run %s", shard.index, run.pk)
+        counts.shards.append(shard.index)
+        EMAILS.labels('sent').inc(counts.sent - before[0])
+        EMAILS.labels('skipped').inc(counts.skipped - before[1])
+        EMAILS.labels('unchanged').inc(counts.unchanged - before[2])
+
+    if not run.shards.exclude(status=EmailShard.Status.DONE).exists():
+        _finish_run(run)
+    return counts
@@ -0,0 +1,97 @@
+# odds.py
+"""
+Moneyline arithmetic: implied probabilities, decimal odds, the edge against
+the AI's probability and single-bet Kelly sizing. Free of model imports, so
+utils and portfolio can both build on it.
+"""
+
+
+def moneyline_to_implied_prob(ml):
+    if ml > 0:
+        return 100 / (ml + 100)
+    else:
+        return -ml / (-ml + 100)
+
+def calculate_moneyline_probs(moneyA, moneyB):
+    """
+    Calculate true probabilities and vig from two money lines.
+    Args:
+        moneyA (int): Money line for team A (e.g., -150)
+        moneyB (int): Money line for team B (e.g., +140)
+    Returns:
+        teamA, teamB, and vig percentage
+    """
+    impProbA = moneyline_to_implied_prob(moneyA)
+    impProbB = moneyline_to_implied_prob(moneyB)
+    totImpProb = impProbA + impProbB
+    vig = (totImpProb - 1)
+    return impProbA, impProbB, vig
+
+# Convert moneyline odds to decimal odds
+def to_decimal_odds(ml):
+    if not ml or ml == 0:
+        return 1
+    if ml > 0:
+        return (ml / 100) + 1
+    return (100 / abs(ml)) + 1
+
+
+def calculate_edge(home_ml, away_ml, home_pct, away_pct):
+    """
+    Calculate the edge and determine which side to bet on.
+    Args:
+        home_ml (int): Money line for home team
+        away_ml (int): Money line for away team
+        home_pct (float): AI-predicted probability for home team
+        away_pct (float): AI-predicted probability for away team
+    Returns:
+        dict: {bet_side, edge_value, ml, prob}
+    """
+
+    home_decimal = to_decimal_odds(home_ml)
+    away_decimal = to_decimal_odds(away_ml)
+
+    # Calculate implied probabilities from odds
+    implied_home_prob = 1 / home_decimal
+    implied_away_prob = 1 / away_decimal
+
+    # Calculate edge
+    home_edge = (home_pct or 0) - implied_home_prob *100
+    away_edge = (away_pct or 0) - implied_away_prob *100
+
+    # Determine which side to bet on
+    if home_edge > away_edge and home_edge > 0:
+        bet_side = "home"
+        edge_value = home_edge  # Convert to percentage
+        ml = home_ml
+        prob = home_pct
+    elif away_edge > 0:
+        bet_side = "away"
+        edge_value = away_edge
+        ml = away_ml
+        prob = away_pct
+    else:
+        bet_side = "none"
+        edge_value = 0
+        ml = 0
+        prob = 0
+
+    return {"bet_side": bet_side, "edge_value": edge_value, "ml": ml, "prob": prob}
+
+def calculate_wager(bet_side, ml, prob, bankroll):
+    """
+    Calculate the wager size using the Kelly Criterion.
+    Args:
+        bet_side (str): "home", "away", or "none"
+        ml (int): Money line for the bet
+        prob (float): Predicted probability
+        bankroll (float): User's bankroll
+    Returns:
+        float: Wager amount
+    """
+    wager = 0
+    if bet_side != "none" and bankroll > 0 and prob > 0:
+        decimal_odds = (ml / 100) + 1 if ml > 0 else (100 / abs(ml)) + 1
+        kelly_fraction = (prob * (decimal_odds - 1) - (1 - prob)) / (decimal_odds - 1)
+        wager = max(0, min(kelly_fraction * bankroll, bankroll))  # Cap between 0 and bankroll
+    return wager
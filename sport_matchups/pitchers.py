@@ -0,0 +1,77 @@
+# pitchers.py
+"""
+Starting pitchers for MLB games, upserted for a whole slate at once.
+
+Ingest sends each side's starter as either a full record
+``{"player_id": 123, "name": "...", "throws": "R"}`` or just the player id.
+Bare ids are resolved from the starts already on file, looked up in one
+query for every id in the slate, so a repeat starter costs nothing extra.
+"""
+from .models import StartingPitcher
+
+
+def parse_pitcher(value):
+    """
+    Normalise a pitcher payload.
+    Returns:
+        dict: {player_id, name, throws}; name/throws are None for a bare id
+    """
+    if isinstance(value, dict):
+        player_id = value.get('player_id', value.get('id'))
+        name, throws = value.get('name'), value.get('throws')
+    else:
+        player_id, name, throws = value, None, None
+    return {
+        'player_id': int(player_id),
+        'name': name,
+        'throws': (throws or '')[:1].upper() or None,
+    }
+
+
+def known_players(player_ids):
+    """{player_id: (name, throws)} from the most recent start of each player."""
+    players = {}
+    rows = (
+        StartingPitcher.objects.filter(player_id__in=set(player_ids))
+        .order_by('player_id', '-game__game_date')
+        .values_list('player_id', 'name', 'throws')
+    )
+    for player_id, name, throws in rows:
+        players.setdefault(player_id, (name, throws))
+    return players
+
+
+def upsert_starting_pitchers(starters):
+    """
+    Create or replace the starter of each (game, team).
+    Args:
+        starters (list): (Game, team_id, parsed pitcher) tuples
+    Returns:
+        (rows written, [(game_id, error message), ...]); game_id is the
+        title the game was posted with, as in the other ingest errors
+    """
+    missing = [p['player_id'] for _, _, p in starters if not (p['name'] and p['throws'])]
+    players = known_players(missing) if missing else {}
+
+    rows, errors = {}, []
+    for game, team_id, pitcher in starters:
+        name, throws = pitcher['name'], pitcher['throws']
+        if not (name and throws):
+            known = players.get(pitcher['player_id'])
+            if known is None:
+                errors.append((game.game_id, f"unknown pitcher {pitcher['player_id']}"))
+                continue
+            name, throws = name or known[0], throws or known[1]
+        # Last entry wins if a slate lists the same game twice
+        rows[(game.pk, team_id)] = StartingPitcher(
+            game=game, team_id=team_id, name=name[:30], throws=throws,
+            player_id=pitcher['player_id'],
+        )
+
+    StartingPitcher.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=['game', 'team'],
+        update_fields=['name', 'throws', 'player_id'],
+    )
+    return len(rows), errors
@@ -0,0 +1,128 @@
+# purge.py
+"""
+Chunked deletion and archiving of past games.
+
+``Game.objects.filter(...).delete()`` makes Django's collector load every game
+and cascade through its children in one transaction. Here games are handled in
+primary-key chunks: each chunk optionally gets archived, then its child rows
+and the games themselves are removed with plain ``DELETE ... WHERE`` statements
+in a short transaction of its own.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import (Game, GameOdds, AIGameOdds,
+                     ArchivedGame, ArchivedGameOdds, ArchivedAIGameOdds)
+
+
+def cascade_children():
+    """(model, fk field name) for every model that cascades from Game."""
+    return [
+        (rel.related_model, rel.field.name)
+        for rel in Game._meta.related_objects
+        if rel.on_delete is models.CASCADE
+    ]
+
+
+def delete_rows(queryset):
+    """
+    Delete without the collector when nothing cascades further down;
+    otherwise fall back to a regular (chunk-bounded) delete.
+    """
+    if queryset.model._meta.related_objects:
+        return queryset.delete()[0]
+    return queryset._raw_delete(queryset.db)
+
+
+def archive_games(pks):
+    """Copy games and their odds into the archive tables, skipping games archived earlier."""
+    games = list(Game.objects.filter(pk__in=pks).values(
+        'id', 'game_id', 'league_id', 'game_date', 'away_team_id', 'home_team_id',
+        'away_score', 'home_score',
+    ))
+    existing = set(ArchivedGame.objects.filter(
+        game_id__in=[g['game_id'] for g in games]
+    ).values_list('game_id', flat=True))
+    new_games = [g for g in games if g['game_id'] not in existing]
+
+    archived = ArchivedGame.objects.bulk_create([
+        ArchivedGame(**{k: v for k, v in g.items() if k != 'id'}) for g in new_games
+    ])
+    # bulk_create sets pks on SQLite and Postgres; map live pk -> archive pk.
+    archive_pk = {g['id']: a.pk for g, a in zip(new_games, archived)}
+
+    odds = []
+    for game_pk, book_id, away_ml, home_ml, spread in GameOdds.objects.filter(
+        game_id__in=archive_pk
+    ).values_list('game_id', 'book_id', 'away_ml', 'home_ml', 'spread'):
+        odds.append(ArchivedGameOdds(
+            game_id=archive_pk[game_pk], book_id=book_id,
+            away_ml=away_ml, home_ml=home_ml, spread=spread,
+        ))
+
+    ai_odds = []
+    for game_pk, ai_id, away_pct, home_pct in AIGameOdds.objects.filter(
+        game_id__in=archive_pk
+    ).values_list('game_id', 'ai_id', 'away_pct', 'home_pct'):
+        ai_odds.append(ArchivedAIGameOdds(
+            game_id=archive_pk[game_pk], ai_id=ai_id, away_pct=away_pct, home_pct=home_pct,
+        ))
+
+    ArchivedGameOdds.objects.bulk_create(odds)
+    ArchivedAIGameOdds.objects.bulk_create(ai_odds)
+    return len(new_games)
+
+
+def purge_past_games(before=None, chunk_size=500, archive=False):
+    """
+    Delete games that started before ``before`` (default: now).
+    Args:
+        before (datetime): Cutoff for game_date
+        chunk_size (int): Games deleted per transaction
+        archive (bool): Copy games and odds into the archive tables first
+    Returns:
+        Counter: rows deleted per model name, plus "archived"
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    before = before or timezone.now()
+    children = cascade_children()
+    counts = Counter()
+    last_pk = 0
+
+    while True:
+        pks = list(
+            Game.objects.filter(game_date__lt=before, pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not pks:
+            break
+        last_pk = pks[-1]
+
+        with transaction.atomic():
+            if archive:
+                counts['archived'] += archive_games(pks)
+            for model, field_name in children:
+                counts[model.__name__] += delete_rows(
+                    model.objects.filter(**{f'{field_name}__in': pks})
+                )
+            # Children are gone, so the games themselves can skip the collector.
+            games = Game.objects.filter(pk__in=pks)
+            counts['Game'] += games._raw_delete(games.db)
+
+    return counts
+
+
+def archive_finished_games(before=None, chunk_size=500):
+    """
+    Move games that started more than ARCHIVE_AFTER ago (or before ``before``)
+    and their odds into the archive tables, keeping the live tables down to
+    the current slate.
+    Returns:
+        Counter: as purge_past_games
+    """
+    before = before or timezone.now() - settings.ARCHIVE_AFTER
+    return purge_past_games(before=before, chunk_size=chunk_size, archive=True)
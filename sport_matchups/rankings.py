@@ -0,0 +1,89 @@
+# rankings.py
+"""
+League-wide percentile ranks for TeamStat rows.
+
+Every team's value for a stat is ranked against the rest of its league in one
+vectorized pass over all affected stats, and score/color are written back with a
+single bulk upsert.
+"""
+import numpy as np
+
+from .models import Stat, TeamStat
+
+# (upper percentile bound, color), worst to best
+COLOR_BUCKETS = (
+    (0.2, '#D9534F'),
+    (0.4, '#F0AD4E'),
+    (0.6, '#CCCCCC'),
+    (0.8, '#8BC34A'),
+    (1.0, '#2E7D32'),
+)
+
+
+def percentile_ranks(groups, values):
+    """
+    Percentile rank (0-1) of each value within its group; ties share the
+    average rank and a group of one gets 0.5.
+    Args:
+        groups (ndarray): Group id per value
+        values (ndarray): Values to rank
+    """
+    n = len(values)
+    ranks = np.empty(n, dtype=float)
+    if not n:
+        return ranks
+    order = np.lexsort((values, groups))
+    g, v = groups[order], values[order]
+
+    # Start index and size of each group, broadcast back to its members
+    group_start = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    group_size = np.diff(np.r_[group_start, n])
+    member_group = np.repeat(np.arange(len(group_start)), group_size)
+
+    # Runs of tied values within a group share their average position
+    run_start = np.flatnonzero(np.r_[True, (g[1:] != g[:-1]) | (v[1:] != v[:-1])])
+    run_size = np.diff(np.r_[run_start, n])
+    avg_pos = np.repeat(run_start + (run_size - 1) / 2, run_size)
+
+    pos_in_group = avg_pos - group_start[member_group]
+    denom = group_size[member_group] - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranks[order] = np.where(denom > 0, pos_in_group / denom, 0.5)
+    return ranks
+
+
+def color_for(percentiles):
+    bounds = np.array([b for b, _ in COLOR_BUCKETS])
+    colors = np.array([c for _, c in COLOR_BUCKETS])
+    return colors[np.minimum(np.searchsorted(bounds, percentiles, side='left'), len(colors) - 1)]
+
+
+def rank_team_stats(stat_ids):
+    """
+    Recompute score (percentile) and color for every TeamStat of the given stats.
+    Returns:
+        set: ids of teams whose rows were re-ranked
+    """
+    rows = list(TeamStat.objects.filter(stat_id__in=stat_ids, value__isnull=False).values_list(
+        'team_id', 'stat_id', 'value'
+    ))
+    if not rows:
+        return set()
+
+    flip = set(Stat.objects.filter(id__in=stat_ids, higher_is_better=False).values_list('id', flat=True))
+    team_ids, groups, values = (np.array(col) for col in zip(*rows))
+    values = np.where(np.isin(groups, list(flip)), -values.astype(float), values.astype(float))
+
+    scores = np.round(percentile_ranks(groups, values), 4)
+    colors = color_for(scores)
+    # An upsert on (team, stat) is one statement per batch, unlike
+    # bulk_update's CASE WHEN per row.
+    TeamStat.objects.bulk_create(
+        [
+            TeamStat(team_id=int(team_id), stat_id=int(stat_id), value=value, score=float(score), color=str(color))
+            for (team_id, stat_id, value), score, color in zip(rows, scores, colors)
+        ],
+        update_conflicts=True, unique_fields=['team', 'stat'], update_fields=['score', 'color'],
+        batch_size=1000,
+    )
+    return set(int(t) for t in team_ids)
@@ -0,0 +1,183 @@
+# reference.py
+"""
+Process-local registry of reference data: leagues, teams (with their
+organization), sportsbooks and AIs.
+
+These tables are small and almost never change, so each process loads them
+once into compact records and ingest/views look names, colors and logos up
+here instead of joining through team -> organization on every query.
+
+Saving or deleting any of those rows drops this process's copy and bumps a
+version key in the shared cache; other processes compare against that key at
+most every REFERENCE_CHECK_SECONDS and reload when it moved. Bulk writes skip
+signals, so code doing them (e.g. seed_data) calls invalidate_reference_data().
+"""
+import threading
+import time
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .logos import team_logo
+from .models import AI, League, Organization, SportsBook, Team
+
+VERSION_KEY = 'reference:version'
+REFERENCE_CHECK_SECONDS = 5
+
+
+class LeagueRef(NamedTuple):
+    id: int
+    name: str
+
+
+class TeamRef(NamedTuple):
+    id: int
+    league_id: int
+    league: str
+    org_id: str
+    abrv: str
+    first_name: str
+    last_name: str
+    color_primary: str
+    color_secondary: str
+    logo: dict
+
+
+TEAM_FIELDS = (
+    'id', 'league_id', 'league__name', 'organization__org_id', 'organization__abrv',
+    'organization__first_name', 'organization__last_name',
+    'organization__color_primary', 'organization__color_secondary',
+)
+
+
+class ReferenceData:
+    def __init__(self, leagues, teams, books, ais, version):
+        self.leagues = {pk: LeagueRef(pk, name) for pk, name in leagues}
+        self.league_ids = {ref.name: ref.id for ref in self.leagues.values()}
+        self.teams = {
+            row[0]: TeamRef(*row, logo=team_logo(row[3])) for row in teams
+        }
+        self.books = dict(books)
+        self.book_ids = {name: pk for pk, name in self.books.items()}
+        self.ais = dict(ais)
+        self.ai_ids = {name: pk for pk, name in self.ais.items()}
+        self.version = version
+        self.checked = time.monotonic()
+
+    def league_id(self, name):
+        try:
+            return self.league_ids[name]
+        except KeyError:
+            raise ValueError(f"unknown league {name}") from None
+
+    def team(self, team_id):
+        try:
+            return self.teams[int(team_id)]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"unknown team {team_id}") from None
+
+    def book_id(self, name):
+        try:
+            return self.book_ids[name]
+        except KeyError:
+            raise ValueError(f"unknown sportsbook {name}") from None
+
+    def ai_id(self, name):
+        try:
+            return self.ai_ids[name]
+        except KeyError:
+            raise ValueError(f"unknown AI {name}") from None
+
+
+_registry = None
+_lock = threading.Lock()
+
+
+def _confirm(registry, version, now):
+    if version != registry.version:
+        return None
+    registry.checked = now
+    return registry
+
+
+def _current(now=None):
+    """The loaded registry if it is still valid, else None."""
+    registry = _registry
+    if registry is None:
+        return None
+    now = now or time.monotonic()
+    if now - registry.checked < REFERENCE_CHECK_SECONDS:
+        return registry
+    return _confirm(registry, cache.get(VERSION_KEY, 0), now)
+
+
+async def _acurrent():
+    """_current() without blocking the event loop on the cache backend."""
+    registry = _registry
+    if registry is None:
+        return None
+    now = time.monotonic()
+    if now - registry.checked < REFERENCE_CHECK_SECONDS:
+        return registry
+    return _confirm(registry, await cache.aget(VERSION_KEY, 0), now)
+
+
+def _querysets():
+    return (
+        League.objects.values_list('id', 'name'),
+        Team.objects.values_list(*TEAM_FIELDS),
+        SportsBook.objects.values_list('id', 'name'),
+        AI.objects.values_list('id', 'name'),
+    )
+
+
+def reference():
+    """The registry, loading it if this process has none or it is stale."""
+    global _registry
+    registry = _current()
+    if registry is None:
+        with _lock:
+            registry = _current()
+            if registry is None:
+                version = cache.get(VERSION_KEY, 0)
+                registry = _registry = ReferenceData(*(list(qs) for qs in _querysets()), version)
+    return registry
+
+
+async def areference():
+    """
+    reference() for async views. The cache read and the registry build (which
+    resolves logo URLs through the static files storage) run off the event loop.
+    """
+    global _registry
+    registry = await _acurrent()
+    if registry is None:
+        version = await cache.aget(VERSION_KEY, 0)
+        rows = [[row async for row in qs] for qs in _querysets()]
+        registry = _registry = await sync_to_async(ReferenceData)(*rows, version)
+    return registry
+
+
+def invalidate_reference_data():
+    """Drop this process's registry and make every other process reload."""
+    global _registry
+    _registry = None
+    if cache.add(VERSION_KEY, 1, timeout=None):
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+@receiver([post_save, post_delete], sender=League)
+@receiver([post_save, post_delete], sender=Organization)
+@receiver([post_save, post_delete], sender=Team)
+@receiver([post_save, post_delete], sender=SportsBook)
+@receiver([post_save, post_delete], sender=AI)
+def reference_data_changed(sender, **kwargs):
+    invalidate_reference_data()
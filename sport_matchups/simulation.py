@@ -0,0 +1,114 @@
+# simulation.py
+"""
+Monte Carlo bankroll simulation for Kelly sizing.
+
+The current slate of picks is replayed ``n_slates`` times with win/loss drawn
+from the AI probability. All outcomes for a batch of paths are drawn in one
+NumPy call and shared across the Kelly fractions being compared, so full vs.
+fractional Kelly are judged on the same luck.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .odds import to_decimal_odds
+
+KELLY_FRACTIONS = (1.0, 0.5, 0.25)
+
+# Outcome draws (paths x slates x picks) per batch. Batches are sized by
+# this rather than a path count, so memory stays flat however long the
+# slates or the pick list get (~15 bytes per draw across the arrays).
+BATCH_ELEMENTS = 1_000_000
+
+# Paths x slates one simulation may run; callers trade paths for slates.
+MAX_PATH_SLATES = 2_000_000
+
+
+def paths_for(n_slates, n_paths=20000):
+    """Paths to simulate so n_paths x n_slates stays within MAX_PATH_SLATES."""
+    return max(1, min(n_paths, MAX_PATH_SLATES // max(n_slates, 1)))
+
+
+def pick_arrays(picks):
+    """
+    Win probability, payout and full-Kelly fraction for each pick from
+    get_games_for_user().
+    """
+    prob = np.array([(p["edge_value"] + p["implied_prob"]) / 100 for p in picks], dtype=float)
+    payout = np.array([to_decimal_odds(p["ml"]) - 1 for p in picks], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kelly = np.where(payout > 0, (prob * payout - (1 - prob)) / payout, 0.0)
+    return np.clip(prob, 0, 1), payout, np.clip(kelly, 0, 1)
+
+
+def _simulate_batch(prob, payout, kelly, fractions, n_paths, n_slates, ruin_level, seed):
+    """Simulate one batch of paths; returns per-fraction arrays of (log growth, max drawdown, ruined)."""
+    rng = np.random.default_rng(seed)
+    wins = rng.random((n_paths, n_slates, len(prob)), dtype=np.float32) < prob
+    ret = np.where(wins, payout, -1.0)
+
+    out = []
+    for fraction in fractions:
+        stake = fraction * kelly
+        # Bets in a slate settle together; never stake more than the bankroll.
+        total = stake.sum()
+        if total > 1:
+            stake = stake / total
+        multiplier = np.maximum(1 + (ret * stake).sum(axis=2), 1e-12)
+        log_path = np.cumsum(np.log(multiplier), axis=1)
+        log_peak = np.maximum.accumulate(np.maximum(log_path, 0), axis=1)
+        drawdown = 1 - np.exp(log_path - log_peak).min(axis=1)
+        ruined = log_path.min(axis=1) <= np.log(ruin_level)
+        out.append((log_path[:, -1], drawdown, ruined))
+    return out
+
+
+def simulate_bankroll(picks, bankroll, fractions=KELLY_FRACTIONS, n_paths=20000, n_slates=100,
+                      ruin_level=0.1, seed=None, processes=1):
+    """
+    Compare Kelly fractions on repeated slates of the given picks.
+    Args:
+        picks (list): Output of get_games_for_user
+        bankroll (float): Starting bankroll
+        fractions (tuple): Multipliers on the full-Kelly stake
+        n_paths (int): Simulated bankroll paths
+        n_slates (int): Slates per path
+        ruin_level (float): Fraction of the starting bankroll counted as ruin
+        seed (int): Seed for reproducible results
+        processes (int): Worker processes to spread batches across
+    Returns:
+        list of dicts, one per Kelly fraction
+    """
+    prob, payout, kelly = pick_arrays(picks)
+    if not len(prob):
+        return []
+
+    batch_size = max(1, BATCH_ELEMENTS // (n_slates * len(prob)))
+    batches = [min(batch_size, n_paths - lo) for lo in range(0, n_paths, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    args = [(prob, payout, kelly, fractions, size, n_slates, ruin_level, s) for size, s in zip(batches, seeds)]
+
+    if processes > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            batch_results = list(pool.map(_simulate_batch, *zip(*args)))
+    else:
+        batch_results = [_simulate_batch(*a) for a in args]
+
+    results = []
+    for i, fraction in enumerate(fractions):
+        log_final = np.concatenate([b[i][0] for b in batch_results])
+        drawdown = np.concatenate([b[i][1] for b in batch_results])
+        ruined = np.concatenate([b[i][2] for b in batch_results])
+        final = bankroll * np.exp(log_final)
+        results.append({
+            "kelly_fraction": fraction,
+            "growth_per_slate": float(np.expm1(log_final.mean() / n_slates) * 100),
+            "median_bankroll": float(np.median(final)),
+            "mean_bankroll": float(final.mean()),
+            "p5_bankroll": float(np.percentile(final, 5)),
+            "p95_bankroll": float(np.percentile(final, 95)),
+            "median_drawdown": float(np.median(drawdown) * 100),
+            "p95_drawdown": float(np.percentile(drawdown, 95) * 100),
+            "risk_of_ruin": float(ruined.mean() * 100),
+        })
+    return results
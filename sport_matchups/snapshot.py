@@ -0,0 +1,102 @@
+# snapshot.py
+"""
+Static snapshot of the current slate, published on ingest.
+
+The game list only changes when games or odds are ingested, so instead of
+rebuilding it on every anonymous page view, ingest renders it once into
+content-hashed files under SLATE_SNAPSHOT_ROOT:
+
+    slate.<hash>.json(.gz)   the game cards, for API-style clients
+    slate.<hash>.html(.gz)   the rendered cards, inserted by game_list.js
+    current.json             tiny pointer to the latest pair
+
+Hashed files never change, so WhiteNoise or a CDN can cache them forever;
+only the pointer has to be revalidated.
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+POINTER_NAME = 'current.json'
+
+# Superseded snapshots kept around for clients still holding an old pointer.
+KEEP_SNAPSHOTS = 5
+
+
+def _write(path, data):
+    """Write atomically, plus a .gz sibling WhiteNoise serves to gzip clients."""
+    for target, content in ((path, data), (path.with_name(path.name + '.gz'), gzip.compress(data, 9, mtime=0))):
+        tmp = target.with_name(f'.{target.name}.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+
+
+def _prune(root, keep):
+    """Remove all but the ``keep`` most recent snapshot sets."""
+    hashes = {}
+    for path in root.glob('slate.*'):
+        digest = path.name.split('.')[1]
+        hashes[digest] = max(hashes.get(digest, 0), path.stat().st_mtime)
+    stale = sorted(hashes, key=hashes.get, reverse=True)[keep:]
+    for digest in stale:
+        for path in root.glob(f'slate.{digest}.*'):
+            path.unlink(missing_ok=True)
+
+
+def build_slate():
+    """Game cards for the home page (same dicts the view renders)."""
+    from .reference import reference
+    from .views import build_game_card, feed_queryset
+
+    ref = reference()
+    cards = []
+    for game in feed_queryset():
+        card = build_game_card(game, ref)
+        if card:
+            cards.append(card)
+    return cards
+
+
+def publish_slate_snapshot():
+    """
+    Render the current slate and point current.json at it.
+    Returns:
+        dict: the pointer contents
+    """
+    root = Path(settings.SLATE_SNAPSHOT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+
+    games = build_slate()
+    html = render_to_string('partials/game_cards.html', {'games': games}).encode()
+    data = json.dumps({'games': games}, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    digest = hashlib.md5(data + html).hexdigest()[:12]
+
+    # Rewritten even when unchanged, so the live set is always the newest
+    # for _prune.
+    json_name, html_name = f'slate.{digest}.json', f'slate.{digest}.html'
+    _write(root / json_name, data)
+    _write(root / html_name, html)
+
+    pointer = {
+        'generated': timezone.now().isoformat(),
+        'count': len(games),
+        'json': settings.SLATE_SNAPSHOT_URL + json_name,
+        'html': settings.SLATE_SNAPSHOT_URL + html_name,
+    }
+    _write(root / POINTER_NAME, json.dumps(pointer).encode())
+    _prune(root, KEEP_SNAPSHOTS)
+    return pointer
+
+
+def slate_pointer_url():
+    """URL of current.json, or None until a snapshot has been published."""
+    if (Path(settings.SLATE_SNAPSHOT_ROOT) / POINTER_NAME).exists():
+        return settings.SLATE_SNAPSHOT_URL + POINTER_NAME
+    return None
@@ -3,15 +3,75 @@ import { populateLeagueFilter, filterGames } from './filter_games.js';
 import { calculateEdge, calculateWager } from './kelly_wager.js';
 import { updateGameDisplay } from './game_display.js';
 
-document.addEventListener("DOMContentLoaded", function() {
+// Fill a shell page from the slate snapshot published on ingest:
+// current.json points at the latest content-hashed HTML cards.
+async function loadSlate(list) {
+    const pointerUrl = list?.dataset.slatePointer;
+    if (!pointerUrl) return;
+    try {
+        const pointerResponse = await fetch(pointerUrl, { cache: "no-cache" });
+        if (!pointerResponse.ok) throw new Error(`pointer: HTTP ${pointerResponse.status}`);
+        const pointer = await pointerResponse.json();
+        const slateResponse = await fetch(pointer.html);
+        if (!slateResponse.ok) throw new Error(`slate: HTTP ${slateResponse.status}`);
+        list.innerHTML = await slateResponse.text();
+    } catch (e) {
+        console.error("Error loading slate snapshot:", e);
+        list.innerHTML = "<p>Could not load games.</p>";
+    }
+}
+
+// Failed fragment fetches are retried after 2s, 4s, 8s, then given up on.
+const MORE_RETRIES = 3;
+
+// Infinite scroll: each page of cards ends with a .games-more marker holding
+// the URL of the next fragment; fetch it once the marker comes into view.
+function watchForMore(list, onCards) {
+    if (!list || !window.IntersectionObserver) return;
+    const observer = new IntersectionObserver(async entries => {
+        for (const entry of entries) {
+            if (!entry.isIntersecting) continue;
+            const marker = entry.target;
+            observer.unobserve(marker);
+            try {
+                const response = await fetch(marker.dataset.nextUrl);
+                if (response.status >= 400 && response.status < 500) {
+                    // A bad cursor will not get better on retry
+                    console.error(`Error loading more games: HTTP ${response.status}`);
+                    continue;
+                }
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                const shown = list.querySelectorAll(".game").length;
+                marker.remove();
+                list.insertAdjacentHTML("beforeend", await response.text());
+                onCards(Array.from(list.querySelectorAll(".game")).slice(shown));
+                const next = list.querySelector(".games-more");
+                if (next) observer.observe(next);
+            } catch (e) {
+                console.error("Error loading more games:", e);
+                const failures = Number(marker.dataset.failures || 0) + 1;
+                marker.dataset.failures = failures;
+                if (failures <= MORE_RETRIES) {
+                    setTimeout(() => observer.observe(marker), 1000 * 2 ** failures);
+                }
+            }
+        }
+    }, { rootMargin: "600px" });
+    const marker = list.querySelector(".games-more");
+    if (marker) observer.observe(marker);
+}
+
+document.addEventListener("DOMContentLoaded", async function() {
+    await loadSlate(document.querySelector(".games-list[data-slate-pointer]"));
+
     const edgeSelect = document.getElementById("edge-select");
     const bankrollSelect = document.getElementById("bankroll-select");
     const leagueFilter = document.getElementById("leagueFilter");
     const dateFilter = document.getElementById("dateFilter");
-    const games = document.querySelectorAll(".game");
+    const gamesList = document.querySelector(".games-list");
 
     // Initialize league filter
-    populateLeagueFilter(games, leagueFilter);
+    populateLeagueFilter(document.querySelectorAll(".game"), leagueFilter);
 
     // Initialize edge and bankroll from userPreferences
     if (window.userPreferences) {
@@ -35,25 +95,47 @@ document.addEventListener("DOMContentLoaded", function() {
     const getEdge = () => edgeSelect ? parseFloat(edgeSelect.value) || 0 : (window.userPreferences?.edge !== undefined ? parseFloat(window.userPreferences.edge) : 0);
     const getBankroll = () => bankrollSelect ? parseFloat(bankrollSelect.value) || 1000 : (window.userPreferences?.bankroll !== undefined ? parseFloat(window.userPreferences.bankroll) : 1000);
 
-    // Function to update games based on filters and display
-    const updateGames = () => {
-        const selectedEdge = getEdge();
-        const bankroll = getBankroll();
-        const visibleGames = filterGames(games, leagueFilter, dateFilter, selectedEdge);
+    // Recompute the pick and wager shown on one card from its data attributes
+    const updateCard = (game, bankroll) => {
+        // Validate dataset attributes
+        const odds = game.dataset.odds ? game.dataset.odds.split(",").map(Number) : [0, 0];
+        const ai = game.dataset.ai ? game.dataset.ai.split(",").map(x => parseFloat(x) / 100.0) : [0, 0];
 
-        visibleGames.forEach(game => {
-            // Validate dataset attributes
-            const odds = game.dataset.odds ? game.dataset.odds.split(",").map(Number) : [0, 0];
-            const ai = game.dataset.ai ? game.dataset.ai.split(",").map(x => parseFloat(x) / 100.0) : [0, 0];
+        // Ensure valid numbers
+        const [home_ml, away_ml] = odds.every(n => !isNaN(n)) ? odds : [0, 0];
+        const [home_pct, away_pct] = ai.every(n => !isNaN(n)) ? ai : [0, 0];
 
-            // Ensure valid numbers
-            const [home_ml, away_ml] = odds.every(n => !isNaN(n)) ? odds : [0, 0];
-            const [home_pct, away_pct] = ai.every(n => !isNaN(n)) ? ai : [0, 0];
+        const { betSide, edgeValue, ml, prob } = calculateEdge(home_ml, away_ml, home_pct, away_pct);
+        const wager = calculateWager(betSide, ml, prob, bankroll);
+        updateGameDisplay(game, betSide, edgeValue, wager, ml, prob);
+    };
 
-            const { betSide, edgeValue, ml, prob } = calculateEdge(home_ml, away_ml, home_pct, away_pct);
-            const wager = calculateWager(betSide, ml, prob, bankroll);
-            updateGameDisplay(game, betSide, edgeValue, wager, ml, prob);
+    // Filter the given cards and refresh the ones left visible
+    const updateCards = (cards) => {
+        const bankroll = getBankroll();
+        filterGames(cards, leagueFilter, getEdge())
+            .forEach(game => updateCard(game, bankroll));
+    };
+
+    // Function to update games based on filters and display
+    const updateGames = () => updateCards(document.querySelectorAll(".game"));
+
+    // Apply odds/edge deltas pushed by the server to just the affected cards
+    const applyOddsDeltas = (deltas) => {
+        const changed = [];
+        deltas.forEach(delta => {
+            const game = document.querySelector(`.game[data-game-id="${CSS.escape(delta.game_id)}"]`);
+            if (!game) return;
+            game.dataset.edge = delta.edge.toFixed(2);
+            game.dataset.odds = `${delta.home_ml},${delta.away_ml}`;
+            game.dataset.ai = `${delta.home_pct},${delta.away_pct}`;
+            game.querySelector(".away-odds").textContent = delta.away_ml;
+            game.querySelector(".home-odds").textContent = delta.home_ml;
+            const spread = game.querySelector(".spread");
+            if (spread) spread.textContent = delta.spread;
+            changed.push(game);
         });
+        if (changed.length) updateCards(changed);
     };
 
     // Run filter on load
@@ -63,9 +145,42 @@ document.addEventListener("DOMContentLoaded", function() {
         console.error("Error updating games on load:", e);
     }
 
+    // Cards appended by infinite scroll get the same filters and picks
+    watchForMore(gamesList, cards => {
+        populateLeagueFilter(cards, leagueFilter);
+        updateCards(cards);
+    });
+
     // Add event listeners
     if (edgeSelect) edgeSelect.addEventListener("change", updateGames);
     if (bankrollSelect) bankrollSelect.addEventListener("change", updateGames);
     leagueFilter.addEventListener("change", updateGames);
-    dateFilter.addEventListener("change", updateGames);
+    // Day views are filtered server-side, so changing the date reloads the page
+    dateFilter.addEventListener("change", () => {
+        if (dateFilter.value === "custom") return;
+        const url = new URL(window.location.href);
+        url.searchParams.delete("start");
+        url.searchParams.delete("end");
+        if (dateFilter.value === "all") {
+            url.searchParams.delete("date");
+        } else {
+            url.searchParams.set("date", dateFilter.value);
+        }
+        window.location.assign(url);
+    });
+
+    // Live odds: the server only sends games whose odds or edge changed
+    const liveUrl = gamesList?.dataset.liveUrl;
+    if (liveUrl && window.EventSource) {
+        const source = new EventSource(liveUrl);
+        source.addEventListener("odds", event => {
+            try {
+                applyOddsDeltas(JSON.parse(event.data).games);
+            } catch (e) {
+                console.error("Error applying live odds:", e);
+            }
+        });
+        // Sent when this page fell too far behind to patch
+        source.addEventListener("resync", () => window.location.reload());
+    }
 });
@@ -40,12 +40,18 @@ export function calculateEdge(home_ml, away_ml, home_pct, away_pct) {
     return { betSide, edgeValue, ml, prob };
 }
 
+// Same per-bet cap as the email digest (portfolio.MAX_BET_FRACTION).
+export const MAX_BET_FRACTION = 0.25;
+
+// Kelly stake for this bet on its own. The digest sizes its picks jointly
+// (portfolio.py), so with several picks open its stakes are smaller than
+// these; for a single pick the two agree.
 export function calculateWager(betSide, ml, prob, bankroll) {
     let wager = 0;
     if (betSide !== "none" && bankroll > 0 && prob > 0 && !isNaN(prob)) {
         const decimalOdds = ml > 0 ? (ml / 100) + 1 : (100 / Math.abs(ml)) + 1;
         const kellyFraction = (prob * (decimalOdds - 1) - (1 - prob)) / (decimalOdds - 1);
-        wager = Math.max(0, Math.min(kellyFraction * bankroll, bankroll)); // Cap between 0 and bankroll
+        wager = Math.max(0, Math.min(kellyFraction, MAX_BET_FRACTION) * bankroll);
     }
     return wager;
 }
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from fefelson.db_routers import PrimaryReplicaRouter
+from fefelson.middleware import ReplicaRoutingMiddleware
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+import numpy as np
+
+from . import notifications
+from .portfolio import MAX_BET_FRACTION, MAX_TOTAL_EXPOSURE, allocate_stakes, optimal_fractions, project
+from .clv import record_closing_lines, record_display_picks, record_email_picks
+from .idempotency import idempotent
+from .ingest import partition, run_by_league
+from .matchups import refresh_matchups
+from .views import parse_date_filter
+from .rankings import COLOR_BUCKETS, color_for, percentile_ranks
+from .models import (
+    AI, AIGameOdds, ClvAggregate, EmailShard, Game, GameMatchup, GameOdds, IdempotencyKey, League, Organization,
+    Pick, Preferences, SportsBook, StartingPitcher, Stat, Team, TeamStat, User,
+)
+
+# The manifest only exists after collectstatic; tests render templates
+# against the plain storage instead.
+TEST_SETTINGS = {
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'ALLOWED_HOSTS': ['testserver'],
+    'SECURE_SSL_REDIRECT': False,
+    'SESSION_COOKIE_SECURE': False,
+}
+
+
+@override_settings(**TEST_SETTINGS)
+class AuthenticatedQueryCountTests(TestCase):
+    """Identity and preferences should cost no queries once the user is cached."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('bettor', password='pw')
+        Preferences.objects.create(user=self.user, edge=5.0, bankroll=2500)
+        self.client.force_login(self.user)
+        # A published snapshot turns the home page into a shell with no game query.
+        self.snapshot_dir = tempfile.TemporaryDirectory()
+        Path(self.snapshot_dir.name, 'current.json').write_text(json.dumps({'html': '', 'json': ''}))
+        settings_override = override_settings(SLATE_SNAPSHOT_ROOT=self.snapshot_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.snapshot_dir.cleanup)
+
+    def test_first_request_loads_user_and_preferences_together(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('game_list'))
+        self.assertEqual(response.context['preferences'], {'edge': 5.0, 'bankroll': 2500})
+
+    def test_cached_user_costs_no_queries(self):
+        self.client.get(reverse('game_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('game_list'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(response.context['preferences'], {'edge': 5.0, 'bankroll': 2500})
+
+    def test_preferences_page_costs_no_queries(self):
+        self.client.get(reverse('game_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('user_preferences'))
+        self.assertEqual(response.context['preferences'], {'edge': 5.0, 'bankroll': 2500})
+
+    def test_saving_preferences_invalidates_cached_user(self):
+        self.client.get(reverse('game_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('user_preferences'), {'edge': '2.5', 'bankroll': '400', 'send_email': 'on'})
+        response = self.client.get(reverse('game_list'))
+        self.assertEqual(response.context['preferences'], {'edge': 2.5, 'bankroll': 400})
+
+    def test_user_without_preferences(self):
+        Preferences.objects.filter(user=self.user).delete()
+        cache.clear()
+        self.client.get(reverse('game_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('game_list'))
+        self.assertIsNone(response.context['preferences'])
+
+
+@override_settings(**TEST_SETTINGS, LIVE_ODDS_ENABLED=True)
+class LiveOddsTests(TestCase):
+    """The endless SSE stream must never be served by a WSGI worker."""
+
+    def test_stream_declined_under_wsgi(self):
+        response = self.client.get(reverse('odds_stream'))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    def test_page_does_not_advertise_stream_under_wsgi(self):
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            Path(snapshot_dir, 'current.json').write_text(json.dumps({'html': '', 'json': ''}))
+            with override_settings(SLATE_SNAPSHOT_ROOT=snapshot_dir):
+                response = self.client.get(reverse('game_list'))
+        self.assertNotContains(response, 'data-live-url')
+
+
+class Crash(BaseException):
+    """Stands in for a worker killed mid-send."""
+
+
+@override_settings(**TEST_SETTINGS)
+class EmailShardTests(TestCase):
+    """Shards are owned by one worker at a time and each user is mailed at most once per run."""
+
+    def setUp(self):
+        self.users = []
+        for i in range(4):
+            user = User.objects.create_user(f'sub{i}', email=f'sub{i}@example.com')
+            Preferences.objects.create(user=user, edge=5.0, bankroll=1000)
+            self.users.append(user)
+        self.run = notifications.start_email_run(shard_size=2)
+        send = mock.patch.object(notifications, 'send_user_email', return_value=True)
+        self.send = send.start()
+        self.addCleanup(send.stop)
+
+    def expire(self, shard):
+        EmailShard.objects.filter(pk=shard.pk).update(lease_expires=timezone.now() - timedelta(seconds=1))
+
+    def mailed(self):
+        return [call.args[0].pk for call in self.send.call_args_list]
+
+    def test_claims_are_exclusive(self):
+        first = notifications.claim_shard(self.run, 'a')
+        second = notifications.claim_shard(self.run, 'b')
+        self.assertEqual((first.index, second.index), (0, 1))
+        self.assertIsNone(notifications.claim_shard(self.run, 'c'))
+
+    def test_expired_lease_is_reclaimed(self):
+        shard = notifications.claim_shard(self.run, 'a')
+        self.expire(shard)
+        taken = notifications.claim_shard(self.run, 'b')
+        self.assertEqual(taken.pk, shard.pk)
+        self.assertEqual(EmailShard.objects.get(pk=shard.pk).claims, 2)
+        with self.assertRaises(notifications.LeaseLost):
+            notifications._advance(shard, self.users[0].pk)
+
+    def test_reclaimed_shard_resumes_after_cursor(self):
+        shard = notifications.claim_shard(self.run, 'a')
+        notifications._advance(shard, self.users[0].pk)
+        self.expire(shard)
+        counts = notifications.work_email_run(self.run, 'b')
+        self.assertEqual(self.mailed(), [u.pk for u in self.users[1:]])
+        self.assertEqual(counts.sent, 3)
+        self.run.refresh_from_db()
+        self.assertIsNotNone(self.run.finished_at)
+
+    def test_user_is_not_mailed_again_after_crash_mid_send(self):
+        self.send.side_effect = Crash
+        with self.assertRaises(Crash):
+            notifications.work_email_run(self.run, 'a')
+        self.send.side_effect = None
+        self.send.return_value = True
+        self.expire(EmailShard.objects.get(run=self.run, index=0))
+        notifications.work_email_run(self.run, 'b')
+        self.assertEqual(self.mailed(), [u.pk for u in self.users])
+
+    def test_send_error_counts_as_skipped(self):
+        self.send.side_effect = [OSError('refused'), True, True, True]
+        counts = notifications.work_email_run(self.run, 'a')
+        self.assertEqual((counts.sent, counts.skipped), (3, 1))
+
+    def test_unchanged_digest_is_not_resent(self):
+        # Started games, so the sent picks are not recorded for CLV
+        game = SimpleNamespace(game_id='g1', game_date=timezone.now() - timedelta(hours=1))
+        picks = [{'game': game, 'bet_side': 'home', 'ml': 120, 'wager': 50.0, 'edge_value': 10.0}]
+        with mock.patch.object(notifications, 'get_games_for_user', return_value=picks):
+            self.assertEqual(notifications.work_email_run(self.run, 'a').sent, 4)
+            counts = notifications.work_email_run(notifications.start_email_run(shard_size=2), 'a')
+            self.assertEqual((counts.sent, counts.unchanged), (0, 4))
+
+            picks[0]['ml'] = 130
+            counts = notifications.work_email_run(notifications.start_email_run(shard_size=2), 'a')
+            self.assertEqual((counts.sent, counts.unchanged), (4, 0))
+        self.assertEqual(len(self.mailed()), 8)
+
+
+class RunByLeagueTests(TestCase):
+    def test_inline_when_not_parallel(self):
+        groups = partition([('NBA', 1), ('NFL', 2), ('NBA', 3)], lambda item: item[0])
+        results = run_by_league(groups, lambda league, items: (league, [n for _, n in items], threading.current_thread()))
+        self.assertEqual([(league, ns) for league, ns, _ in results], [('NBA', [1, 3]), ('NFL', [2])])
+        self.assertTrue(all(thread is threading.current_thread() for _, _, thread in results))
+
+    def test_threads_per_league_keep_group_order(self):
+        groups = partition(['NBA', 'NFL', 'MLB'], lambda league: league)
+        with mock.patch('sport_matchups.ingest.parallel_ingest', return_value=True):
+            results = run_by_league(groups, lambda league, items: (league, threading.current_thread().name))
+        self.assertEqual([league for league, _ in results], ['NBA', 'NFL', 'MLB'])
+        self.assertTrue(all(name.startswith('ingest') for _, name in results))
+
+
+@override_settings(**TEST_SETTINGS)
+class GameIngestTests(TestCase):
+    """Each league is written in one transaction with a savepoint per game."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('ingest')
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'Token ' + Token.objects.create(user=user).key
+        SportsBook.objects.create(name='MGM')
+        AI.objects.create(name='ESPN')
+        self.teams = {}
+        for league_name in ('NBA', 'NFL'):
+            league = League.objects.create(name=league_name)
+            for side in ('home', 'away'):
+                org = Organization.objects.create(
+                    org_id=f'{league_name[:2]}{side[0]}', abrv=side, first_name=side, last_name=league_name,
+                    color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+                )
+                self.teams[league_name, side] = Team.objects.create(organization=org, league=league).pk
+
+    def game(self, title, league, **extra):
+        game = {
+            'title': title, 'leagueId': league, 'gameTime': (timezone.now() + timedelta(days=1)).isoformat(),
+            'homeId': self.teams.get((league, 'home'), 0), 'awayId': self.teams.get((league, 'away'), 0),
+            'odds': [{'home_ml': -120, 'away_ml': 110, 'home_spread': -2.5}], 'predictor': [['away', 45.0], ['home', 55.0]],
+        }
+        game.update(extra)
+        return game
+
+    def post(self, games):
+        return self.client.post(reverse('game-list'), {'games': games}, content_type='application/json')
+
+    def test_bad_games_are_reported_without_undoing_the_rest(self):
+        with self.assertLogs('sport_matchups.api_views', 'ERROR'):
+            response = self.post([
+                self.game('nba-ok', 'NBA'),
+                self.game('nba-bad-team', 'NBA', homeId=999999),
+                # Fails after the Game row is written; its savepoint undoes it
+                self.game('nba-bad-odds', 'NBA', odds=[{'home_ml': None, 'away_ml': 110, 'home_spread': -2.5}]),
+                self.game('nfl-ok', 'NFL'),
+                self.game('xfl', 'XFL'),
+            ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body['created_games']), 2)
+        self.assertEqual(
+            sorted(error['game'] for error in body['errors']),
+            ['nba-bad-odds', 'nba-bad-team', 'xfl'],
+        )
+        self.assertEqual(set(Game.objects.values_list('game_id', flat=True)), {'nba-ok', 'nfl-ok'})
+
+    def test_unusable_league_id_is_a_game_error(self):
+        response = self.post([self.game('listed', 'NBA', leagueId=['NBA']), 'junk'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['error'] for e in response.json()['errors']], ['missing or invalid leagueId'] * 2)
+
+
+    def test_bare_pitcher_id_resolves_from_earlier_starts(self):
+        self.post([self.game('first', 'NBA', home_pitcher={'player_id': 7, 'name': 'Ace', 'throws': 'r'})])
+        self.assertEqual(self.post([self.game('second', 'NBA', home_pitcher=7)]).json()['errors'], [])
+        starter = StartingPitcher.objects.get(game__game_id='second')
+        self.assertEqual((starter.player_id, starter.name, starter.throws), (7, 'Ace', 'R'))
+
+    def test_unknown_pitcher_is_reported_against_the_game_id(self):
+        response = self.post([self.game('unknown-starter', 'NBA', home_pitcher=99)])
+        self.assertEqual(response.json()['errors'], [{'game': 'unknown-starter', 'error': 'unknown pitcher 99'}])
+        self.assertTrue(Game.objects.filter(game_id='unknown-starter').exists())
+        self.assertFalse(StartingPitcher.objects.exists())
+
+    def test_new_starter_replaces_the_old_one(self):
+        self.post([self.game('swap', 'NBA', home_pitcher={'player_id': 7, 'name': 'Ace', 'throws': 'R'})])
+        self.post([self.game('swap', 'NBA', home_pitcher={'player_id': 8, 'name': 'Relief', 'throws': 'L'})])
+        self.assertEqual(
+            list(StartingPitcher.objects.values_list('team_id', 'player_id', 'name', 'throws')),
+            [(self.teams['NBA', 'home'], 8, 'Relief', 'L')],
+        )
+
+@override_settings(**TEST_SETTINGS)
+class GameCardsFragmentTests(TestCase):
+    def test_malformed_cursor_is_rejected(self):
+        for after in ('abc,5', '2026-01-01T00:00:00+00:00,x', ',5', 'garbage'):
+            response = self.client.get(reverse('game_cards_fragment'), {'after': after})
+            self.assertEqual(response.status_code, 400, after)
+
+
+@override_settings(REPLICA_EXEMPT_PATHS=['/admin/'], REPLICA_STICKY_SECONDS=15)
+class ReplicaRoutingTests(SimpleTestCase):
+    """Safe requests read from the replica; writes, the admin and pinned clients use the primary."""
+
+    def setUp(self):
+        configured = mock.patch('fefelson.db_routers.replica_configured', return_value=True)
+        configured.start()
+        self.addCleanup(configured.stop)
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request):
+        """(alias reads used inside the request, response)"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(Game)
+            seen['write'] = self.router.db_for_write(Game)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen, response
+
+    def test_get_reads_replica(self):
+        seen, response = self.handle(self.factory.get('/'))
+        self.assertEqual(seen, {'read': 'replica', 'write': 'default'})
+        self.assertNotIn('pin_primary', response.cookies)
+
+    def test_post_uses_primary_and_pins_client(self):
+        seen, response = self.handle(self.factory.post('/preferences/'))
+        self.assertEqual(seen['read'], 'default')
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 15)
+
+    def test_admin_uses_primary(self):
+        seen, _ = self.handle(self.factory.get('/admin/sport_matchups/game/'))
+        self.assertEqual(seen['read'], 'default')
+
+    def test_pinned_client_reads_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES['pin_primary'] = '1'
+        seen, _ = self.handle(request)
+        self.assertEqual(seen['read'], 'default')
+
+    def test_outside_a_request_reads_primary(self):
+        self.handle(self.factory.get('/'))
+        self.assertEqual(self.router.db_for_read(Game), 'default')
+
+
+class PortfolioTests(SimpleTestCase):
+    """Joint Kelly sizing of the picks a digest sends together."""
+
+    def test_single_pick_is_independent_kelly(self):
+        # p=0.55 at even money: Kelly fraction 0.55 - 0.45 = 0.10
+        (fraction,) = optimal_fractions((0.55,), (1.0,))
+        self.assertAlmostEqual(fraction, 0.10, places=4)
+
+    def test_single_pick_is_capped(self):
+        (fraction,) = optimal_fractions((0.9,), (1.0,))
+        self.assertAlmostEqual(fraction, MAX_BET_FRACTION, places=6)
+
+    def test_caps_per_bet_and_total(self):
+        fractions = optimal_fractions((0.7, 0.7, 0.7, 0.7), (1.0, 1.0, 1.0, 1.0))
+        self.assertTrue(all(0 <= f <= MAX_BET_FRACTION + 1e-9 for f in fractions))
+        self.assertLessEqual(sum(fractions), MAX_TOTAL_EXPOSURE + 1e-9)
+        # Each would get 0.4 on its own; jointly the total cap binds
+        self.assertAlmostEqual(sum(fractions), MAX_TOTAL_EXPOSURE, places=6)
+
+    def test_project_stays_feasible(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            f = rng.normal(0.2, 0.3, size=rng.integers(1, 8))
+            projected = project(f, 0.25, 0.5)
+            self.assertTrue(np.all(projected >= 0) and np.all(projected <= 0.25 + 1e-12))
+            self.assertLessEqual(projected.sum(), 0.5 + 1e-9)
+        feasible = np.array([0.1, 0.2, 0.05])
+        np.testing.assert_allclose(project(feasible, 0.25, 0.5), feasible)
+
+    def test_allocate_stakes_in_pick_order(self):
+        picks = [
+            {'edge_value': 5.0, 'implied_prob': 50.0, 'ml': 100},
+            {'edge_value': 0.0, 'implied_prob': 50.0, 'ml': 100},
+        ]
+        stakes = allocate_stakes(picks, 1000)
+        self.assertAlmostEqual(stakes[0], 100.0, places=1)
+        self.assertAlmostEqual(stakes[1], 0.0, places=1)
+
+
+@override_settings(**TEST_SETTINGS)
+class RankingTests(TestCase):
+    """Score is the league-relative percentile of value; color is its bucket."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('stats')
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'Token ' + Token.objects.create(user=user).key
+        league = League.objects.create(name='NBA')
+        self.teams = []
+        for i in range(3):
+            org = Organization.objects.create(
+                org_id=f'nba{i}', abrv=str(i), first_name=str(i), last_name='NBA',
+                color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+            )
+            self.teams.append(Team.objects.create(organization=org, league=league).pk)
+
+    def post(self, rows):
+        return self.client.post(reverse('team-list'), {'team_stats': rows}, content_type='application/json')
+
+    def test_ties_share_the_average_rank(self):
+        ranks = percentile_ranks(np.array([1, 1, 1, 1, 2]), np.array([1.0, 2.0, 2.0, 3.0, 7.0]))
+        np.testing.assert_allclose(ranks, [0.0, 0.5, 0.5, 1.0, 0.5])
+
+    def test_bucket_edges(self):
+        colors = [c for _, c in COLOR_BUCKETS]
+        self.assertEqual(
+            list(color_for(np.array([0.0, 0.2, 0.2001, 0.8, 0.8001, 1.0]))),
+            [colors[0], colors[0], colors[1], colors[3], colors[4], colors[4]],
+        )
+
+    def test_lower_is_better_flips_the_rank(self):
+        self.post([
+            {'league': 'NBA', 'name': 'TOV', 'teamId': team, 'value': value, 'higher_is_better': False}
+            for team, value in zip(self.teams, (10.0, 12.0, 14.0))
+        ])
+        scores = dict(TeamStat.objects.values_list('team_id', 'score'))
+        self.assertEqual([scores[t] for t in self.teams], [1.0, 0.5, 0.0])
+        self.assertFalse(Stat.objects.get(name='TOV').higher_is_better)
+
+    def test_score_is_taken_as_the_value_for_old_clients(self):
+        response = self.post([
+            {'league': 'NBA', 'name': 'PTS', 'teamId': team, 'score': value, 'color': 'red'}
+            for team, value in zip(self.teams, (100.0, 110.0, 120.0))
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['warnings'])
+        rows = {t: (v, s, c) for t, v, s, c in TeamStat.objects.values_list('team_id', 'value', 'score', 'color')}
+        self.assertEqual([rows[t] for t in self.teams], [
+            (100.0, 0.0, COLOR_BUCKETS[0][1]), (110.0, 0.5, COLOR_BUCKETS[2][1]), (120.0, 1.0, COLOR_BUCKETS[4][1]),
+        ])
+
+    def test_failed_ranking_writes_nothing(self):
+        with mock.patch('sport_matchups.api_views.rank_team_stats', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            self.post([{'league': 'NBA', 'name': 'PTS', 'teamId': self.teams[0], 'value': 1.0}])
+        self.assertFalse(Stat.objects.exists())
+        self.assertFalse(TeamStat.objects.exists())
+
+
+class MatchupTests(TestCase):
+    """Each off_/def_ pair gives one row per direction, rebuilt only for affected games."""
+
+    def setUp(self):
+        league = League.objects.create(name='NBA')
+        teams = []
+        for i in range(4):
+            org = Organization.objects.create(
+                org_id=f'nba{i}', abrv=str(i), first_name=str(i), last_name='NBA',
+                color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+            )
+            teams.append(Team.objects.create(organization=org, league=league))
+        self.teams = teams
+        tomorrow = timezone.now() + timedelta(days=1)
+        self.games = [
+            Game.objects.create(game_id=f'g{i}', league=league, game_date=tomorrow, away_team=away, home_team=home)
+            for i, (away, home) in enumerate(((teams[0], teams[1]), (teams[2], teams[3])))
+        ]
+        for name in ('off_pts', 'def_pts', 'pace'):
+            stat = Stat.objects.create(league=league, name=name)
+            for i, team in enumerate(teams):
+                TeamStat.objects.create(team=team, stat=stat, value=i, score=i / 4, color=f'c{i}')
+
+    def test_rows_for_both_directions(self):
+        self.assertEqual(refresh_matchups(), 2)
+        rows = {
+            (m.game.game_id, m.offense): (m.stat_key, m.off_score, m.def_score, m.differential)
+            for m in GameMatchup.objects.select_related('game')
+        }
+        self.assertEqual(rows, {
+            ('g0', 'away'): ('pts', 0.0, 0.25, -0.25),
+            ('g0', 'home'): ('pts', 0.25, 0.0, 0.25),
+            ('g1', 'away'): ('pts', 0.5, 0.75, -0.25),
+            ('g1', 'home'): ('pts', 0.75, 0.5, 0.25),
+        })
+
+    def test_only_affected_games_are_rebuilt(self):
+        refresh_matchups()
+        untouched = set(GameMatchup.objects.filter(game=self.games[1]).values_list('pk', flat=True))
+        TeamStat.objects.filter(team=self.teams[0], stat__name='off_pts').update(score=0.9)
+
+        self.assertEqual(refresh_matchups(team_ids={self.teams[0].pk}), 1)
+        self.assertEqual(set(GameMatchup.objects.filter(game=self.games[1]).values_list('pk', flat=True)), untouched)
+        self.assertEqual(GameMatchup.objects.get(game=self.games[0], offense='away').off_score, 0.9)
+
+
+class FlakyView(APIView):
+    outcome = None
+
+    @idempotent('flaky')
+    def post(self, request):
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return Response({}, status=self.outcome)
+
+
+@override_settings(**TEST_SETTINGS)
+class IdempotencyTests(TestCase):
+    """A key is processed once, replayed after, and released if the request fails."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('retry')
+        self.client.defaults['HTTP_AUTHORIZATION'] = 'Token ' + Token.objects.create(user=self.user).key
+        league = League.objects.create(name='NBA')
+        org = Organization.objects.create(
+            org_id='nba', abrv='NBA', first_name='N', last_name='BA',
+            color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+        )
+        self.team = Team.objects.create(organization=org, league=league).pk
+
+    def post(self, value, key='k1'):
+        rows = [{'league': 'NBA', 'name': 'PTS', 'teamId': self.team, 'value': value}]
+        return self.client.post(
+            reverse('team-list'), {'team_stats': rows}, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def flaky(self, outcome):
+        request = APIRequestFactory().post('/flaky/', {}, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        force_authenticate(request, user=self.user)
+        return FlakyView.as_view(outcome=outcome)(request)
+
+    def test_retry_is_replayed_without_touching_data(self):
+        first = self.post(1.0)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.post(1.0)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        touched = [q['sql'] for q in queries if '"sport_matchups_stat' in q['sql'] or '"sport_matchups_game' in q['sql']]
+        self.assertEqual(touched, [])
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+
+    def test_different_body_is_rejected(self):
+        self.post(1.0)
+        self.assertEqual(self.post(2.0).status_code, 422)
+        self.assertEqual(TeamStat.objects.get().value, 1.0)
+
+    def test_in_flight_key_conflicts(self):
+        self.post(1.0)
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        self.assertEqual(self.post(1.0).status_code, 409)
+
+    def test_abandoned_key_is_taken_over(self):
+        self.post(1.0)
+        TeamStat.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, response=None, created_at=timezone.now() - timedelta(hours=1))
+        with self.assertLogs('sport_matchups.idempotency', 'WARNING'):
+            response = self.post(1.0)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response.headers)
+        self.assertTrue(TeamStat.objects.exists())
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 200)
+
+    def test_key_is_released_on_server_error(self):
+        self.assertEqual(self.flaky(503).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.flaky(201).status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_key_is_released_on_exception(self):
+        with self.assertRaises(RuntimeError):
+            self.flaky(RuntimeError())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class ClvTests(TestCase):
+    """Picks keep their first price and are scored once, when the game starts."""
+
+    def setUp(self):
+        self.league = League.objects.create(name='NBA')
+        self.teams = []
+        for side in ('home', 'away'):
+            org = Organization.objects.create(
+                org_id=side, abrv=side, first_name=side, last_name='NBA',
+                color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+            )
+            self.teams.append(Team.objects.create(organization=org, league=self.league))
+        self.book = SportsBook.objects.create(name='MGM')
+        self.ai = AI.objects.create(name='ESPN')
+        self.later = timezone.now() + timedelta(days=2)
+
+    def game(self, game_id, starts_in, odds=True):
+        game = Game.objects.create(
+            game_id=game_id, league=self.league, game_date=timezone.now() + starts_in,
+            home_team=self.teams[0], away_team=self.teams[1],
+        )
+        if odds:
+            # The AI gives home 60% against an implied 45.5%: a home pick at +120
+            GameOdds.objects.create(game=game, book=self.book, home_ml=120, away_ml=-140, spread=1.5)
+            AIGameOdds.objects.create(game=game, ai=self.ai, home_pct=60.0, away_pct=40.0)
+        return game
+
+    def email_pick(self, game, ml):
+        return {'game': game, 'bet_side': 'home', 'ml': ml, 'edge_value': 10.0}
+
+    def test_first_price_wins_per_source(self):
+        game = self.game('g', timedelta(days=1))
+        record_display_picks([game.pk])
+        GameOdds.objects.update(home_ml=110)
+        record_display_picks([game.pk])
+        record_email_picks([self.email_pick(game, 110)])
+        record_email_picks([self.email_pick(game, 105)])
+        self.assertEqual(
+            sorted(Pick.objects.values_list('source', 'side', 'ml')),
+            [('display', 'home', 120), ('email', 'home', 110)],
+        )
+
+    def test_picks_are_scored_once(self):
+        game = self.game('g', timedelta(days=1))
+        record_display_picks([game.pk])
+        GameOdds.objects.update(home_ml=100)
+
+        self.assertEqual(record_closing_lines(now=self.later), {'games': 1, 'closing_lines': 1, 'picks': 1})
+        self.assertEqual(record_closing_lines(now=self.later), {'games': 0, 'closing_lines': 0, 'picks': 0})
+        aggregate = ClvAggregate.objects.get()
+        # 2.2 decimal taken against a 2.0 close
+        self.assertEqual((aggregate.picks, aggregate.beat_close), (1, 1))
+        self.assertAlmostEqual(aggregate.clv_sum, 10.0)
+
+    def test_started_game_without_odds_is_marked_done(self):
+        game = self.game('no-odds', -timedelta(minutes=5), odds=False)
+        self.assertEqual(record_closing_lines(), {'games': 1, 'closing_lines': 0, 'picks': 0})
+        game.refresh_from_db()
+        self.assertTrue(game.close_recorded)
+        self.assertEqual(record_closing_lines()['games'], 0)
+
+    def test_email_picks_only_for_upcoming_games(self):
+        started = self.game('started', -timedelta(minutes=5))
+        upcoming = self.game('upcoming', timedelta(days=1))
+        record_email_picks([self.email_pick(started, 120), self.email_pick(upcoming, 120)])
+        self.assertEqual(list(Pick.objects.values_list('game_key', flat=True)), ['upcoming'])
+
+
+class LocalDateTests(TestCase):
+    """local_date is the game's calendar day in America/New_York, not UTC."""
+
+    def setUp(self):
+        league = League.objects.create(name='NBA')
+        teams = []
+        for side in ('home', 'away'):
+            org = Organization.objects.create(
+                org_id=side, abrv=side, first_name=side, last_name='NBA',
+                color_primary='#000000', color_secondary='#FFFFFF', role='PRO',
+            )
+            teams.append(Team.objects.create(organization=org, league=league))
+        self.game_kwargs = {'league': league, 'home_team': teams[0], 'away_team': teams[1]}
+
+    def day(self, value):
+        _, _, filters = parse_date_filter(QueryDict(f'date={value}'))
+        return sorted(Game.objects.filter(**filters).values_list('game_id', flat=True))
+
+    def test_evening_game_keeps_its_eastern_date_across_utc_midnight(self):
+        # 22:30 EDT on July 1 is already July 2 in UTC; ingest sends ISO strings
+        late = Game.objects.create(game_id='late', game_date='2026-07-02T02:30:00+00:00', **self.game_kwargs)
+        after = Game.objects.create(game_id='after', game_date='2026-07-02T04:30:00+00:00', **self.game_kwargs)
+        self.assertEqual(str(late.local_date), '2026-07-01')
+        self.assertEqual(str(after.local_date), '2026-07-02')
+        self.assertEqual(self.day('2026-07-01'), ['late'])
+        self.assertEqual(self.day('2026-07-02'), ['after'])
+
+    def test_moving_the_game_moves_its_date(self):
+        game = Game.objects.create(game_id='moved', game_date='2026-07-02T02:30:00+00:00', **self.game_kwargs)
+        game.game_date = '2026-07-02T16:00:00+00:00'
+        game.save(update_fields=['game_date'])
+        self.assertEqual(self.day('2026-07-02'), ['moved'])
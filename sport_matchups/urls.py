@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import GameViewSet, TeamStatViewSet, Login, Logout, send_email_notifications
-from .views import game_list, game_detail
+from .views import game_list, game_cards_fragment, game_detail, game_feed, game_matchups, metrics, odds_stream, strategy_backtest, bankroll_simulation
 
 # API router
 router = DefaultRouter()
@@ -19,4 +19,11 @@ urlpatterns = [
     # Normal views
     path('', game_list, name="game_list"),  # Home page
     path('game/<str:game_id>/', game_detail, name="game_detail"),
+    path('game/<str:game_id>/matchups/', game_matchups, name="game_matchups"),
+    path('feed/', game_feed, name="game_feed"),
+    path('feed/cards/', game_cards_fragment, name="game_cards_fragment"),
+    path('live/odds/', odds_stream, name="odds_stream"),
+    path('backtest/', strategy_backtest, name="strategy_backtest"),
+    path('simulate/', bankroll_simulation, name="bankroll_simulation"),
+    path('metrics/', metrics, name="metrics"),
 ]
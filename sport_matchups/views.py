@@ -1,160 +1,486 @@
-from django.shortcuts import render, redirect
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, aget_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
-from django.templatetags.static import static
-from .models import Game, GameOdds, AIGameOdds, Team, Organization, TeamStat, Stat
-from datetime import datetime
-from django.shortcuts import render, get_object_or_404
-from django.contrib.auth import login
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Game, League, Preferences
+
+from .auth_backends import preferences_cached
+from .backtest import MAX_GRID_POINTS, load_history, parse_grid, run_backtest
+from .live import broadcaster, sse_message
+from .metrics import VIEW_SECONDS, exposition, record_cache, timed
+from .reference import areference
+from .simulation import paths_for, simulate_bankroll
+from .snapshot import slate_pointer_url
+from .odds import calculate_moneyline_probs
+from .utils import get_games_for_user
+
+
+# Views are async so a single ASGI worker can hold many slow connections
+# open; every ORM call below goes through the async queryset API and nothing
+# may touch the database lazily (e.g. un-prefetched FKs) while rendering.
+
+def feed_queryset():
+    # Leagues, teams, books and AIs come from the reference registry, not joins.
+    # (game_date, id) is a total order, so it doubles as the page cursor.
+    return Game.objects.prefetch_related('gameodds_set', 'aigameodds_set').order_by('game_date', 'id')
+
+
+def team_card(ref, team_id):
+    team = ref.team(team_id)
+    return {'name': team.abrv, 'logo': team.logo}
+
+
+def first_game_odds(game, ref):
+    """Latest book odds from the prefetched set (``.first()`` would re-query)."""
+    odds = next(iter(game.gameodds_set.all()), None)
+    if odds is None:
+        return {}
+    return {
+        'book_name': ref.books.get(odds.book_id, ''),
+        'away_ml': odds.away_ml,
+        'home_ml': odds.home_ml,
+        'spread': odds.spread
+    }
+
+
+def first_ai_odds(game, ref):
+    ai_odds_instance = next(iter(game.aigameodds_set.all()), None)
+    if ai_odds_instance is None:
+        return {}
+    return {
+        'ai_name': ref.ais.get(ai_odds_instance.ai_id, ''),
+        'away_pct': ai_odds_instance.away_pct,
+        'home_pct': ai_odds_instance.home_pct
+    }
+
+
+def game_teams(game, ref):
+    """League name and team cards of a game; KeyError/ValueError for unknown ids."""
+    return {
+        'league': ref.leagues[game.league_id].name,
+        'away_team': team_card(ref, game.away_team_id),
+        'home_team': team_card(ref, game.home_team_id),
+    }
+
+
+def build_game_card(game, ref):
+    """
+    The per-game dict shown on the game list, or None if odds are incomplete.
+    ``ref`` is the reference registry (reference()/areference()).
+    """
+    game_odds = first_game_odds(game, ref)
+    ai_odds = first_ai_odds(game, ref)
+    if not (game_odds and ai_odds):
+        return None
+    try:
+        teams = game_teams(game, ref)
+    except (KeyError, ValueError):
+        # Added after this process loaded the registry; the card shows up
+        # once it reloads.
+        return None
+
+    impAwayPct, impHomePct, vig = calculate_moneyline_probs(game_odds["away_ml"], game_odds["home_ml"])
+    game_odds["away_pct"] = impAwayPct * 100
+    game_odds["home_pct"] = impHomePct * 100
+    game_odds["vig"] = vig * 100
+
+    awayEdge = ai_odds["away_pct"] - game_odds["away_pct"]
+    homeEdge = ai_odds["home_pct"] - game_odds["home_pct"]
+    edge = max(awayEdge, homeEdge)
+
+    return {
+        'game_id': game.game_id,
+        **teams,
+        'game_date': game.game_date,
+        'game_odds': game_odds,
+        'ai_odds': ai_odds,
+        'edge': edge,
+    }
+
 
-from .utils import calculate_moneyline_probs
+def _parse_day(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
 
 
+def parse_date_filter(params):
+    """
+    Game filter for ``?date=today|tomorrow|future|YYYY-MM-DD`` or an
+    inclusive ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` range, on the stored
+    local_date so a day view only reads that day's rows.
+    Args:
+        params (QueryDict): request.GET
+    Returns:
+        (selected, label, filter kwargs): ('all', '', {}) without a valid filter
+    """
+    today = timezone.localdate()
+    value = params.get('date', '')
+    if value == 'today':
+        return value, '', {'local_date': today}
+    if value == 'tomorrow':
+        return value, '', {'local_date': today + timedelta(days=1)}
+    if value == 'future':
+        return value, '', {'local_date__gt': today}
+    day = _parse_day(value)
+    if day:
+        return 'custom', day.strftime('%b %d, %Y'), {'local_date': day}
 
-def game_list(request):
-    # --- existing game building code ---
-    games = Game.objects.select_related(
-        'league', 'away_team', 'home_team',
-        'away_team__organization', 'home_team__organization'
-    ).prefetch_related('gameodds_set', 'aigameodds_set').order_by('game_date')
+    start, end = _parse_day(params.get('start')), _parse_day(params.get('end'))
+    filters = {}
+    if start:
+        filters['local_date__gte'] = start
+    if end:
+        filters['local_date__lte'] = end
+    if not filters:
+        return 'all', '', {}
+    label = f"{start.strftime('%b %d') if start else '…'} – {end.strftime('%b %d') if end else '…'}"
+    return 'custom', label, filters
 
+
+async def get_game_cards(filters=None):
+    ref = await areference()
     game_data = []
-    for game in games:
-        away_logo = static(f'images/logos/{game.away_team.organization.org_id}.png')
-        home_logo = static(f'images/logos/{game.home_team.organization.org_id}.png')
-
-        game_odds = {}
-        if game.gameodds_set.exists():
-            odds = game.gameodds_set.first()
-            game_odds = {
-                'book_name': odds.book.name,
-                'away_ml': odds.away_ml,
-                'home_ml': odds.home_ml,
-                'spread': odds.spread
-            }
-        ai_odds = {}
-        if game.aigameodds_set.exists():
-            ai_odds_instance = game.aigameodds_set.first()
-            ai_odds = {
-                'ai_name': ai_odds_instance.ai.name,
-                'away_pct': ai_odds_instance.away_pct,
-                'home_pct': ai_odds_instance.home_pct
-            }
-        if game_odds and ai_odds:
-            impAwayPct, impHomePct, vig = calculate_moneyline_probs(game_odds["away_ml"], game_odds["home_ml"])
-            game_odds["away_pct"] = impAwayPct * 100
-            game_odds["home_pct"] = impHomePct * 100
-            game_odds["vig"] = vig * 100
-
-            awayEdge = ai_odds["away_pct"] - game_odds["away_pct"]
-            homeEdge = ai_odds["home_pct"] - game_odds["home_pct"]
-            edge = max(awayEdge, homeEdge)
-
-            game_data.append({
-                'game_id': game.game_id,
-                'league': game.league.name,
-                'away_team': {'name': game.away_team.organization.abrv, 'logo': away_logo},
-                'home_team': {'name': game.home_team.organization.abrv, 'logo': home_logo},
-                'game_date': game.game_date,
-                'game_odds': game_odds,
-                'ai_odds': ai_odds,
-                'edge': edge,
-            })
+    async for game in feed_queryset().filter(**(filters or {})):
+        card = build_game_card(game, ref)
+        if card:
+            game_data.append(card)
+    return game_data
+
+
+# Game cards per page of the game list / card fragments.
+GAMES_PAGE_SIZE = 20
+# Browser/proxy cache lifetime of a card fragment; live odds patch the cards after that.
+FRAGMENT_MAX_AGE = 30
 
-    # --- preferences injection ---
-    preferences = None
-    if request.user.is_authenticated and hasattr(request.user, "preferences"):
-        preferences = {
-            "edge": request.user.preferences.edge,
-            "bankroll": request.user.preferences.bankroll,
-        }
 
+def encode_cursor(game):
+    return f"{game.game_date.isoformat()},{game.pk}"
+
+
+def parse_cursor(value):
+    """(game_date, pk) from ``encode_cursor``, or None if malformed."""
+    game_date, _, pk = (value or '').rpartition(',')
+    try:
+        game_date, pk = parse_datetime(game_date), int(pk)
+    except (TypeError, ValueError):
+        return None
+    return (game_date, pk) if game_date is not None else None
+
+
+async def get_game_page(filters, after=None, limit=GAMES_PAGE_SIZE):
+    """
+    One page of game cards by keyset pagination on (game_date, id), so
+    later pages cost the same as the first.
+    Args:
+        filters (dict): Game filter kwargs (see parse_date_filter)
+        after (tuple): (game_date, pk) of the last game on the previous page
+    Returns:
+        (cards, cursor for the next page or None)
+    """
+    games = feed_queryset().filter(**filters)
+    if after:
+        game_date, pk = after
+        games = games.filter(Q(game_date__gte=game_date) & (Q(game_date__gt=game_date) | Q(pk__gt=pk)))
+    ref = await areference()
+    rows = [game async for game in games[:limit + 1]]
+    cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    # Games without complete odds get no card, so a page can run short.
+    cards = [card for card in (build_game_card(game, ref) for game in rows[:limit]) if card]
+    return cards, cursor
+
+
+def next_page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['after'] = cursor
+    return f"{reverse('game_cards_fragment')}?{params.urlencode()}"
+
+
+async def get_user_preferences(request):
+    """
+    Resolve the user without blocking and pin it on the request, so the auth
+    context processor does not hit the database synchronously while rendering.
+    CachedModelBackend loads preferences along with the user; other backends
+    cost one query here.
+    """
+    user = await request.auser()
+    request.user = user
+    if not user.is_authenticated:
+        return None
+
+    if preferences_cached(user):
+        prefs = getattr(user, 'preferences', None)
+    else:
+        prefs = await Preferences.objects.filter(user=user).afirst()
+    if prefs is None:
+        return None
+    return {
+        "edge": prefs.edge,
+        "bankroll": prefs.bankroll,
+    }
+
+
+@timed(VIEW_SECONDS, 'game_list')
+async def game_list(request):
+    # Once ingest has published a snapshot the page is just a shell and
+    # game_list.js loads the cards from static files.
+    # Date-filtered views are rendered from the matching rows instead.
+    date_filter, date_label, filters = parse_date_filter(request.GET)
+    slate_pointer = None
+    if not filters:
+        slate_pointer = slate_pointer_url()
+        record_cache('slate_snapshot', slate_pointer is not None)
+    games, cursor = ([], None) if slate_pointer else await get_game_page(filters)
     context = {
-        'games': game_data,
-        'preferences': preferences,
+        'slate_pointer': slate_pointer,
+        'games': games,
+        'next_url': next_page_url(request, cursor),
+        'live_odds': live_odds_available(request),
+        'date_filter': date_filter,
+        'date_label': date_label,
+        'preferences': await get_user_preferences(request),
     }
     return render(request, "sport_matchups/game_list.html", context)
 
 
-def game_detail(request, game_id):
-    game = get_object_or_404(
-        Game.objects.select_related(
-            'league', 'away_team', 'home_team',
-            'away_team__organization', 'home_team__organization'
-        ).prefetch_related('gameodds_set', 'aigameodds_set'),
-        game_id=game_id
-    )
+async def game_cards_fragment(request):
+    """
+    A page of rendered game cards for infinite scroll, ending with a marker
+    that carries the next page's URL. Pages depend only on the query string,
+    so they are publicly cacheable and revalidate by ETag.
+    """
+    after = None
+    if 'after' in request.GET:
+        after = parse_cursor(request.GET['after'])
+        if after is None:
+            return HttpResponseBadRequest("Invalid cursor")
+    games, cursor = await get_game_page(parse_date_filter(request.GET)[2], after)
+    html = render_to_string('partials/game_cards_page.html', {
+        'games': games,
+        'next_url': next_page_url(request, cursor),
+    })
 
-    team_stats = {
-        'home': TeamStat.objects.filter(team=game.home_team).select_related('stat').order_by('stat__name'),
-        'away': TeamStat.objects.filter(team=game.away_team).select_related('stat').order_by('stat__name')
-    }
+    etag = f'"{hashlib.md5(html.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag) or HttpResponse(html)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=FRAGMENT_MAX_AGE)
+    return response
 
-    logos = {
-        'away': static(f'images/logos/{game.away_team.organization.org_id}.png'),
-        'home': static(f'images/logos/{game.home_team.organization.org_id}.png')
-    }
 
-    game_odds = {}
-    if game.gameodds_set.exists():
-        odds = game.gameodds_set.first()
-        impAwayPct, impHomePct, vig = calculate_moneyline_probs(odds.away_ml, odds.home_ml)
-        game_odds = {
-            'book_name': odds.book.name,
-            'away_ml': odds.away_ml,
-            'home_ml': odds.home_ml,
-            'spread': odds.spread,
-            'away_pct': impAwayPct * 100,
-            'home_pct': impHomePct * 100,
-            'vig': vig * 100,
-        }
-
-    ai_odds = {}
-    if game.aigameodds_set.exists():
-        ai_odds_instance = game.aigameodds_set.first()
-        ai_odds = {
-            'ai_name': ai_odds_instance.ai.name,
-            'away_pct': ai_odds_instance.away_pct,
-            'home_pct': ai_odds_instance.home_pct,
-        }
-
-    stat_keys = ["pts", "rush_yards", "pass_yards", "turns", "penalty_yards", "sack_yds_lost"]
-    stats = {"away": {}, "home": {}}
-
-    for a_h in ("away", "home"):
-        stats[a_h]["stats_dict"] = {ts.stat.name: ts for ts in team_stats[a_h]}
-        stats[a_h]["stat_pairs"] = []
-        for key in stat_keys:
-            off_stat = stats[a_h]["stats_dict"].get(f"off_{key}")
-            def_stat = stats[a_h]["stats_dict"].get(f"def_{key}")
+async def game_feed(request):
+    """
+    JSON version of the game list for clients that render the slate
+    themselves; takes the same date filters as the game list.
+    """
+    games = await get_game_cards(parse_date_filter(request.GET)[2])
+    for game in games:
+        game['game_date'] = game['game_date'].isoformat()
+    return JsonResponse({'games': games})
+
+
+async def get_matchup_stats(game):
+    """
+    Per-team offense/defense bars from the precomputed GameMatchup rows: a
+    team's offense comes from its own row, its defense from the opponent's.
+    """
+    matchups = {(m.offense, m.stat_key): m async for m in game.matchups.order_by('stat_key')}
+    keys = sorted({key for _, key in matchups})
+    stats = {}
+    for a_h, other in (("away", "home"), ("home", "away")):
+        stats[a_h] = {"stat_pairs": []}
+        for key in keys:
+            off_stat = matchups.get((a_h, key))
+            def_stat = matchups.get((other, key))
             stats[a_h]["stat_pairs"].append({
                 'stat': key,
-                'off_score': off_stat.score * 100 if off_stat else 0,
-                'off_color': off_stat.color if off_stat else '#CCCCCC',
-                'def_score': def_stat.score * 100 if def_stat else 0,
-                'def_color': def_stat.color if def_stat else '#CCCCCC',
+                'off_score': off_stat.off_score * 100 if off_stat and off_stat.off_score is not None else 0,
+                'off_color': off_stat.off_color if off_stat and off_stat.off_color else '#CCCCCC',
+                'def_score': def_stat.def_score * 100 if def_stat and def_stat.def_score is not None else 0,
+                'def_color': def_stat.def_color if def_stat and def_stat.def_color else '#CCCCCC',
             })
+    return stats
+
+
+# Comment frame sent when idle so proxies keep the connection open.
+SSE_KEEPALIVE_SECONDS = 25
+
+
+def live_odds_available(request):
+    """
+    Whether this request may open the live odds stream: it must be enabled
+    and served over ASGI, where each client is a parked coroutine. Under
+    WSGI the endless stream would be drained by async_to_sync and hold a
+    worker for good.
+    """
+    return settings.LIVE_ODDS_ENABLED and isinstance(request, ASGIRequest)
+
+
+async def odds_stream(request):
+    """
+    Server-Sent Events stream of odds/edge changes pushed by ingest.
+    Answers 204 when live odds are not available, which also tells
+    EventSource not to reconnect.
+    """
+    if not live_odds_available(request):
+        return HttpResponse(status=204)
+
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_message(message)
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def game_matchups(request, game_id):
+    """The precomputed matchup rows for a game as JSON."""
+    game = await aget_object_or_404(Game, game_id=game_id)
+    rows = [
+        m async for m in game.matchups.order_by('offense', 'stat_key').values(
+            'offense', 'stat_key', 'off_score', 'off_color', 'def_score', 'def_color', 'differential'
+        )
+    ]
+    return JsonResponse({'game_id': game.game_id, 'matchups': rows})
+
+
+@timed(VIEW_SECONDS, 'game_detail')
+async def game_detail(request, game_id):
+    game = await aget_object_or_404(feed_queryset().prefetch_related('startingpitcher_set'), game_id=game_id)
+    ref = await areference()
+    try:
+        teams = game_teams(game, ref)
+    except (KeyError, ValueError):
+        raise Http404("Game not available yet")
+    league = teams['league']
+    pitchers = {p.team_id: {'name': p.name, 'throws': p.throws} for p in game.startingpitcher_set.all()}
+
+    game_odds = first_game_odds(game, ref)
+    if game_odds:
+        impAwayPct, impHomePct, vig = calculate_moneyline_probs(game_odds['away_ml'], game_odds['home_ml'])
+        game_odds.update({
+            'away_pct': impAwayPct * 100,
+            'home_pct': impHomePct * 100,
+            'vig': vig * 100,
+        })
+
+    ai_odds = first_ai_odds(game, ref)
+
+    stats = await get_matchup_stats(game)
 
     game_data = {
         'game_id': game.game_id,
-        'league': game.league.name,
+        'league': league,
         'game_date': game.game_date,
         'game_odds': game_odds,
         'ai_odds': ai_odds,
-        'away_team': {'name': game.away_team.organization.abrv, 'logo': logos['away'], "stats": stats['away']},
-        'home_team': {'name': game.home_team.organization.abrv, 'logo': logos['home'], "stats": stats['home']},
+        'away_team': {**teams['away_team'], "stats": stats['away'],
+                      "pitcher": pitchers.get(game.away_team_id)},
+        'home_team': {**teams['home_team'], "stats": stats['home'],
+                      "pitcher": pitchers.get(game.home_team_id)},
     }
 
-    # --- preferences injection ---
-    preferences = None
-    if request.user.is_authenticated and hasattr(request.user, "preferences"):
-        preferences = {
-            "edge": request.user.preferences.edge,
-            "bankroll": request.user.preferences.bankroll,
-        }
+    preferences = await get_user_preferences(request)
 
     template_map = {
         'NFL': 'sport_matchups/football_game_detail.html',
         'NCAAF': 'sport_matchups/football_game_detail.html',
     }
-    template_name = template_map.get(game.league.name, 'sport_matchups/game_detail.html')
+    template_name = template_map.get(league, 'sport_matchups/game_detail.html')
     return render(request, template_name, {'game_data': game_data, 'preferences': preferences})
+
+
+@staff_member_required
+def strategy_backtest(request):
+    """Staff-only grid backtest of the edge/Kelly strategy over finished games."""
+    params = {
+        'min_edge': request.GET.get('min_edge', '0:15:0.5'),
+        'kelly': request.GET.get('kelly', '0.25,0.5,1'),
+        'bankroll': request.GET.get('bankroll', '1000'),
+        'league': request.GET.get('league', ''),
+    }
+    context = {
+        'params': params,
+        'leagues': League.objects.values_list('name', flat=True).order_by('name'),
+    }
+    try:
+        min_edges, kelly_fractions = parse_grid(params['min_edge']), parse_grid(params['kelly'])
+        bankroll = float(params['bankroll'])
+    except ValueError:
+        context['error'] = (f"Grids must look like 5, 2.5,5,7.5 or 0:15:0.5 (positive step, at most "
+                            f"{MAX_GRID_POINTS} values) and bankroll must be a number.")
+        return render(request, "sport_matchups/backtest.html", context)
+
+    started = time.perf_counter()
+    history = load_history(leagues=[params['league']] if params['league'] else None)
+    results = run_backtest(history, min_edges, kelly_fractions, bankroll)
+    context.update({
+        'results': results[:50],
+        'game_count': len(history['game_date']),
+        'combination_count': len(results),
+        'elapsed': time.perf_counter() - started,
+    })
+    return render(request, "sport_matchups/backtest.html", context)
+
+
+@login_required
+def bankroll_simulation(request):
+    """Risk profile of full vs. fractional Kelly on the user's current picks."""
+    prefs = getattr(request.user, "preferences", None) or Preferences(edge=7.5, bankroll=1000)
+    max_slates = 500
+    try:
+        n_slates = min(max(int(request.GET.get("slates", 100)), 1), max_slates)
+    except ValueError:
+        n_slates = 100
+    # Long horizons get fewer paths so every request costs about the same
+    n_paths = paths_for(n_slates)
+
+    started = time.perf_counter()
+    picks = get_games_for_user(prefs)
+    results = simulate_bankroll(picks, prefs.bankroll, n_paths=n_paths, n_slates=n_slates)
+    context = {
+        "preferences": {"edge": prefs.edge, "bankroll": prefs.bankroll},
+        "pick_count": len(picks),
+        "results": results,
+        "n_slates": n_slates,
+        "max_slates": max_slates,
+        "n_paths": n_paths,
+        "elapsed": time.perf_counter() - started,
+    }
+    return render(request, "sport_matchups/bankroll_simulation.html", context)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint; staff or METRICS_ALLOWED_IPS only."""
+    if not (request.user.is_staff or request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS):
+        raise PermissionDenied
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
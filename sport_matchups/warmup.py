@@ -0,0 +1,135 @@
+# warmup.py
+"""
+Work a fresh process would otherwise do on its first requests.
+
+Run from the ``warmup`` command after a deploy, or from gunicorn.conf.py
+before workers accept traffic: with ``preload_app`` the master warms up once
+and every forked worker inherits the compiled templates, URL resolver, static
+manifest and logo map.
+"""
+import logging
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.template import engines
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def _urls():
+    from . import api_views, views  # noqa: F401  (import cost paid here)
+
+    get_resolver().url_patterns
+    reverse('game_list')
+    return len(get_resolver().reverse_dict)
+
+
+def _templates():
+    """Compile every project/app template into the cached loader."""
+    names = set()
+    for directory in engines['django'].template_dirs:
+        directory = Path(directory)
+        names.update(str(p.relative_to(directory)) for p in directory.rglob('*.html'))
+    for name in sorted(names):
+        get_template(name)
+    return len(names)
+
+
+def _static_manifest():
+    # Loads staticfiles.json; without it (no collectstatic yet) there is nothing to load.
+    try:
+        staticfiles_storage.url('css/game_list.css')
+    except ValueError:
+        return 0
+    return len(getattr(staticfiles_storage, 'hashed_files', {}))
+
+
+def _logos():
+    from .logos import logo_urls
+
+    return len(logo_urls())
+
+
+def _reference():
+    from .reference import reference
+
+    return len(reference().teams)
+
+
+def _slate():
+    """Publish a slate snapshot if none exists, so first page views are shells."""
+    from .snapshot import publish_slate_snapshot, slate_pointer_url
+
+    if slate_pointer_url():
+        return 0
+    return publish_slate_snapshot()['count']
+
+
+STEPS = (
+    ('urls', _urls),
+    ('templates', _templates),
+    ('static manifest', _static_manifest),
+    ('logos', _logos),
+    ('reference data', _reference),
+    ('slate snapshot', _slate),
+)
+
+
+def warm_up():
+    """
+    Run every warmup step. A failing step is logged and skipped: warmup
+    must never keep the server from starting.
+    Returns:
+        list of (step, items warmed or None if it failed, seconds)
+    """
+    report = []
+    try:
+        for name, step in STEPS:
+            start = time.perf_counter()
+            try:
+                count = step()
+            except Exception:
+                logger.exception("Warmup step %r failed", name)
+                count = None
+            report.append((name, count, time.perf_counter() - start))
+    finally:
+        # Never hand an open DB connection to forked workers.
+        connections.close_all()
+    return report
+
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def import_time_report(module='fefelson.wsgi', limit=20):
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime``.
+    Returns:
+        (total seconds, [(cumulative seconds, self seconds, module), ...] slowest first)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows, total = [], 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if len(indent) == 1:  # top-level import
+            total += int(cumulative_us)
+        rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name))
+    rows.sort(reverse=True)
+    return total / 1e6, rows[:limit]